@@ -0,0 +1,93 @@
+"""
+Production server settings, gunicorn reads this file from the working
+directory. Start the project from the directory of manage.py with:
+
+    gunicorn
+
+SERVER_WORKER_MODE picks the worker model: "thread" (default) runs the WSGI
+application in threaded sync workers, "async" runs the ASGI application in
+uvicorn workers from the uvicorn-worker package. The other SERVER_* variables
+below override the defaults derived from the CPU count.
+"""
+
+import os
+
+# not "from decouple import config", gunicorn would read the name as its
+# own config setting
+import decouple
+
+
+def cpu_count():
+    # the CPUs this process may run on, which is less than os.cpu_count()
+    # in a container limited to a CPU set
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers(mode, cpus):
+    """
+    One process per CPU for async workers, which never block on I/O. Threaded
+    workers block per thread, so they get a few more processes """
+    if mode == "async":
+        return cpus
+    return cpus * 2 + 1
+
+
+WORKER_CLASSES = {
+    "thread": "gthread",
+    # uvicorn.workers is deprecated in favour of the uvicorn-worker package
+    "async": "uvicorn_worker.UvicornWorker",
+}
+APPLICATIONS = {
+    "thread": "taskproject.wsgi:application",
+    "async": "taskproject.asgi:application",
+}
+
+mode = decouple.config("SERVER_WORKER_MODE", default="thread")
+if mode not in WORKER_CLASSES:
+    raise ValueError(
+        f"SERVER_WORKER_MODE has to be one of {', '.join(WORKER_CLASSES)}"
+    )
+
+wsgi_app = APPLICATIONS[mode]
+worker_class = WORKER_CLASSES[mode]
+workers = decouple.config(
+    "SERVER_WORKERS", default=default_workers(mode, cpu_count()), cast=int
+)
+# ignored by async workers
+threads = decouple.config("SERVER_THREADS", default=4, cast=int)
+bind = decouple.config("SERVER_BIND", default="0.0.0.0:8000")
+
+# import the project and warm it up once in the master process, forked
+# workers then share those pages copy-on-write instead of each loading them
+preload_app = True
+
+# restart a worker after this many requests to cap slow memory growth, the
+# jitter keeps all workers from restarting at the same time
+max_requests = decouple.config("SERVER_MAX_REQUESTS", default=1000, cast=int)
+max_requests_jitter = max(1, max_requests // 10)
+
+# on SIGTERM workers stop accepting connections and get this long to finish
+# the requests they have before they are killed
+graceful_timeout = decouple.config("SERVER_GRACEFUL_TIMEOUT", default=30, cast=int)
+timeout = decouple.config("SERVER_TIMEOUT", default=30, cast=int)
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    # a database connection opened while preloading would be inherited by
+    # every worker, sharing one socket between processes corrupts it
+    from django.db import connections
+
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    from django.db import connections
+
+    connections.close_all()
@@ -1,12 +1,38 @@
 from django.contrib import admin
 
-from .models import Comment, Task, User
+from .models import Comment, Task, User, WebhookEndpoint, Workspace
+from .paginator import EstimatedCountPaginator
 
 
 # Register your models here.
+class WorkspaceAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "slug", "db_alias")
+    list_display_links = ("id", "name")
+    prepopulated_fields = {"slug": ("name",)}
+
+
 class UserAdmin(admin.ModelAdmin):
-    list_display = ("id", "email", "first_name", "last_name")
+    list_display = ("id", "email", "first_name", "last_name", "workspace")
     list_display_links = ("id", "email", "first_name", "last_name")
+    search_fields = ("email", "first_name", "last_name")
+    list_filter = ("workspace",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class DeletedFilter(admin.SimpleListFilter):
+    title = "deleted"
+    parameter_name = "deleted"
+
+    def lookups(self, request, model_admin):
+        return [("no", "No"), ("yes", "Yes")]
+
+    def queryset(self, request, queryset):
+        if self.value() == "no":
+            return queryset.filter(deleted_at__isnull=True)
+        if self.value() == "yes":
+            return queryset.filter(deleted_at__isnull=False)
+        return queryset
 
 
 class TaskAdmin(admin.ModelAdmin):
@@ -28,13 +54,59 @@ class TaskAdmin(admin.ModelAdmin):
         "assigned_by",
         "assigned_at",
     )
+    list_select_related = ("assigned_to", "assigned_by")
+    list_filter = ("workspace", "status", "complete", "priority", DeletedFilter)
+    search_fields = ("title", "assigned_to__email", "assigned_by__email")
+    date_hierarchy = "due_date"
+    autocomplete_fields = ("assigned_to", "assigned_by")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # soft deleted tasks included, so the unfiltered changelist queries the
+        # whole table and the paginator can use the estimated count
+        queryset = Task.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
 
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("id", "content", "task", "commented_by")
     list_display_links = ("id", "content", "task", "commented_by")
+    list_select_related = ("task", "commented_by")
+    search_fields = ("content", "commented_by__email")
+    date_hierarchy = "created"
+    raw_id_fields = ("task",)
+    autocomplete_fields = ("commented_by",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "url",
+        "workspace",
+        "is_active",
+        "last_event_id",
+        "failures",
+        "next_attempt_at",
+    )
+    list_display_links = ("id", "url")
+    list_filter = ("workspace", "is_active")
+    readonly_fields = (
+        "last_event_id",
+        "failures",
+        "failing_since",
+        "next_attempt_at",
+        "last_error",
+    )
 
 
+admin.site.register(Workspace, WorkspaceAdmin)
 admin.site.register(User, UserAdmin)
 admin.site.register(Task, TaskAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(WebhookEndpoint, WebhookEndpointAdmin)
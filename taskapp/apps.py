@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TaskappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'taskapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .routers import reserve_id_range
+
+        post_migrate.connect(reserve_id_range, sender=self)
@@ -0,0 +1,66 @@
+from django.db import router, transaction
+
+from .models import ArchivedComment, ArchivedTask, Comment, Task
+from .signals import archiving
+
+TASK_FIELDS = [
+    "id",
+    "workspace_id",
+    "created",
+    "modified",
+    "title",
+    "description",
+    "due_date",
+    "assigned_to_id",
+    "assigned_by_id",
+    "complete",
+    "assigned_at",
+    "priority",
+    "status",
+]
+COMMENT_FIELDS = ["id", "created", "modified", "content", "task_id", "commented_by_id"]
+
+
+def archivable_tasks(cutoff):
+    return Task.objects.filter(complete=True, modified__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Moves up to batch_size completed tasks last modified before cutoff, with
+    their comments, into the archive tables. Returns the number moved """
+    # the archive tables are on default, the tasks maybe elsewhere
+    db = router.db_for_write(Task)
+    with transaction.atomic(using=db), transaction.atomic():
+        ids = list(
+            archivable_tasks(cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        tasks = list(Task.objects.filter(id__in=ids))
+        ArchivedTask.objects.bulk_create(
+            ArchivedTask(**{field: getattr(task, field) for field in TASK_FIELDS})
+            for task in tasks
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row)
+            for row in Comment.objects.filter(task_id__in=ids).values(
+                *COMMENT_FIELDS
+            )
+        )
+        Comment.objects.filter(task_id__in=ids).delete()
+        with archiving(tasks):
+            Task.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_completed_tasks(cutoff, batch_size=500):
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
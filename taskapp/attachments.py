@@ -0,0 +1,179 @@
+import hashlib
+import mimetypes
+import os
+import re
+import secrets
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.db import transaction
+
+from .models import Attachment
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def storage():
+    return FileSystemStorage(location=settings.ATTACHMENT_ROOT)
+
+
+def blob_name(workspace_id, sha256):
+    # files are shared within a workspace only, so nobody can find out
+    # whether another workspace holds a file by uploading it
+    return os.path.join(str(workspace_id or "default"), sha256[:2], sha256[2:])
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spools uploads to a temporary file chunk by chunk, never holding a whole
+    file in memory, and hashes each chunk on its way to disk. Files over
+    ATTACHMENT_MAX_SIZE are dropped as soon as they cross it """
+
+    too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.ATTACHMENT_MAX_SIZE:
+            self.too_large = True
+            raise SkipFile
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.hasher.hexdigest()
+        return uploaded
+
+
+def store(workspace_id, uploaded):
+    """
+    Moves an upload from HashingUploadHandler into the attachment storage,
+    unless a file with the same content is already there """
+    name = blob_name(workspace_id, uploaded.sha256)
+    files = storage()
+    if not files.exists(name):
+        saved = files.save(name, uploaded)
+        if saved != name:
+            # stored concurrently by another upload, keep that copy
+            files.delete(saved)
+    return name
+
+
+def create_attachment(task, uploaded, user, comment=None):
+    """
+    Creates the attachment and stores its file. The row comes first and has
+    to be committed before the file is looked for, delete_blob relies on it.
+    It is removed again when the file cannot be stored """
+    # the client's content type is not trusted, it is served back to others
+    content_type, _ = mimetypes.guess_type(uploaded.name)
+    attachment = Attachment.objects.create(
+        workspace_id=task.workspace_id,
+        task=task,
+        comment=comment,
+        uploaded_by=user,
+        name=os.path.basename(uploaded.name)[:255],
+        content_type=content_type or "application/octet-stream",
+        size=uploaded.size,
+        sha256=uploaded.sha256,
+    )
+    try:
+        store(task.workspace_id, uploaded)
+    except Exception:
+        attachment.delete()
+        raise
+    return attachment
+
+
+def in_use(db, workspace_id, sha256):
+    return (
+        Attachment.objects.using(db)
+        .filter(workspace_id=workspace_id, sha256=sha256)
+        .exists()
+    )
+
+
+def delete_blob(db, workspace_id, sha256):
+    """
+    Deletes the stored file of workspace_id and sha256 unless an attachment
+    on db uses it. The file is moved aside before the last check: an upload
+    looking for it afterwards stores its own copy, and one that found it
+    earlier had already created its row, which the check then sees """
+    if in_use(db, workspace_id, sha256):
+        return
+    path = storage().path(blob_name(workspace_id, sha256))
+    aside = f"{path}.{secrets.token_hex(8)}.deleted"
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:
+        return
+    if in_use(db, workspace_id, sha256):
+        # same content as any copy stored meanwhile
+        os.replace(aside, path)
+    else:
+        os.remove(aside)
+
+
+def delete_attachments(queryset):
+    """
+    Deletes the attachments in queryset and, once that is committed, the
+    stored files no other attachment uses """
+    blobs = set(queryset.values_list("workspace_id", "sha256"))
+    if not blobs:
+        return
+    db = queryset.db
+    queryset.delete()
+
+    def delete_unused():
+        for workspace_id, sha256 in blobs:
+            delete_blob(db, workspace_id, sha256)
+
+    transaction.on_commit(delete_unused, using=db)
+
+
+def parse_range(header, size):
+    """
+    The (first, last) byte positions a Range header asks for. None for headers
+    to ignore, multiple ranges included, the whole file is sent then. Raises
+    ValueError for a range outside the file """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # the last n bytes
+        length = int(last)
+        if not length or not size:
+            raise ValueError("Range not satisfiable")
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None  # invalid, so ignored
+    if first >= size:
+        raise ValueError("Range not satisfiable")
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last
+
+
+class RangeFile:
+    """
+    Reads at most length bytes of file from its current position """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
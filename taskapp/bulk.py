@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from django.core.mail import get_connection
+from django.db import router, transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .dependencies import update_dependents_bulk
+from .models import STATUS_CHOICES, Task, TaskDependency, User
+from .signals import record_task_updates
+from .stats import record_task_changes, snapshot
+from .utils import task_updates_email
+
+
+def validate_batch(tasks, complete):
+    """
+    Applies the rules of UpdateMyTaskView to tasks ordered by id, as if they
+    were updated one after the other. A task whose previous task is in the
+    batch sees that task's new state. Returns a list of error messages """
+    errors = []
+    state = {}
+    for task in tasks:
+        if task.blocked:
+            errors.append(f"'{task}' is waiting for the tasks it depends on")
+            continue
+        previous_complete = state.get(task.previous_id, task.previous_complete)
+        # tasks with dependencies are ordered by those, see previous_task
+        if task.has_dependencies:
+            previous_complete = True
+        if task.previous_id is not None and not previous_complete:
+            errors.append(
+                f"You cannot update '{task}' until the previous task is completed"
+            )
+            continue
+        state[task.id] = complete
+    return errors
+
+
+def send_status_emails(tasks):
+    """
+    Sends every assigner one message covering all of their tasks in tasks """
+    by_assigner = defaultdict(list)
+    for task in tasks:
+        by_assigner[task.assigned_by_id].append(task)
+    assigners = User.objects.in_bulk(list(by_assigner))
+    connection = get_connection()
+    connection.send_messages(
+        [
+            task_updates_email(assigners[assigner_id], assigner_tasks, connection)
+            for assigner_id, assigner_tasks in by_assigner.items()
+            if assigner_id in assigners
+        ]
+    )
+
+
+def bulk_update_status(user, task_ids, status):
+    """
+    Sets the status of the tasks with the given ids, which have to be assigned
+    to user. The whole batch is loaded and checked with one query and written
+    with one bulk_update, either every task is updated or none. Returns the
+    updated tasks and a list of error messages """
+    if status not in dict(STATUS_CHOICES):
+        return [], [f"'{status}' is not a valid status"]
+    task_ids = set(task_ids)
+    if not task_ids:
+        return [], ["Select at least one task"]
+    complete = status == "completed"
+    db = router.db_for_write(Task)
+    previous = Task.objects.filter(
+        assigned_to=user, id__lt=OuterRef("id")
+    ).order_by("-id")
+
+    with transaction.atomic(using=db):
+        tasks = list(
+            Task.objects.using(db)
+            .select_for_update()
+            .filter(id__in=task_ids, assigned_to=user)
+            .annotate(
+                previous_id=Subquery(previous.values("id")[:1]),
+                previous_complete=Subquery(previous.values("complete")[:1]),
+                has_dependencies=Exists(
+                    TaskDependency.objects.filter(task_id=OuterRef("id"))
+                ),
+            )
+            .order_by("id")
+        )
+        errors = [
+            f"Task {task_id} is not assigned to you"
+            for task_id in sorted(task_ids - {task.id for task in tasks})
+        ]
+        errors += validate_batch(tasks, complete)
+        if errors:
+            return [], errors
+
+        before = [snapshot(task) for task in tasks]
+        now = timezone.now()
+        for task in tasks:
+            task.status = status
+            task.complete = complete
+            # bulk_update skips auto_now
+            task.modified = now
+        Task.objects.using(db).bulk_update(tasks, ["status", "complete", "modified"])
+        after = [snapshot(task) for task in tasks]
+
+        record_task_changes(list(zip(before, after)))
+        update_dependents_bulk(list(zip(tasks, before, after)))
+        record_task_updates(tasks)
+        transaction.on_commit(lambda: send_status_emails(tasks), using=db)
+    return tasks, []
@@ -0,0 +1,205 @@
+from collections import Counter, defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Task, TaskDependency
+
+# every task reachable from the first parameter by following dependency
+# edges, UNION drops rows already seen so the walk ends on any graph
+UPSTREAM_SQL = """
+WITH RECURSIVE upstream(id) AS (
+    SELECT depends_on_id FROM {table} WHERE task_id = %s
+    UNION
+    SELECT d.depends_on_id FROM {table} d JOIN upstream u ON d.task_id = u.id
+)
+SELECT 1 FROM upstream WHERE id = %s
+"""
+
+
+def is_blocking(task):
+    """
+    Whether task keeps the tasks depending on it blocked. Takes a task or a
+    taskapp.stats snapshot, which is None for a deleted task """
+    if task is None or getattr(task, "deleted_at", None) is not None:
+        return False
+    return not task.complete
+
+
+def database_for(task):
+    return router.db_for_write(TaskDependency, instance=task)
+
+
+def depends_on_transitively(task, other):
+    """
+    Whether task depends on other directly or through other tasks """
+    db = database_for(task)
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            UPSTREAM_SQL.format(table=TaskDependency._meta.db_table),
+            [task.pk, other.pk],
+        )
+        return cursor.fetchone() is not None
+
+
+def check_dependency(task, depends_on):
+    if task.pk == depends_on.pk:
+        raise ValidationError("A task cannot depend on itself.")
+    if depends_on_transitively(depends_on, task):
+        raise ValidationError(
+            f"'{depends_on}' already depends on '{task}', "
+            "adding this dependency would create a cycle."
+        )
+
+
+def add_dependency(task, depends_on):
+    """
+    Makes task depend on depends_on. Raises ValidationError when the edge would
+    close a cycle """
+    db = database_for(task)
+    with transaction.atomic(using=db):
+        # lock both ends in a fixed order so two requests adding opposite
+        # edges cannot both pass the cycle check
+        locked = {
+            locked_task.pk: locked_task
+            for locked_task in Task.all_objects.using(db)
+            .select_for_update()
+            .filter(pk__in=[task.pk, depends_on.pk])
+            .order_by("pk")
+        }
+        check_dependency(task, depends_on)
+        _, created = TaskDependency.objects.using(db).get_or_create(
+            task_id=task.pk, depends_on_id=depends_on.pk
+        )
+        if created and is_blocking(locked[depends_on.pk]):
+            Task.all_objects.using(db).filter(pk=task.pk).update(
+                blocked_by_count=F("blocked_by_count") + 1
+            )
+
+
+def remove_dependency(task, depends_on):
+    db = database_for(task)
+    with transaction.atomic(using=db):
+        depends_on = (
+            Task.all_objects.using(db).select_for_update().get(pk=depends_on.pk)
+        )
+        deleted, _ = (
+            TaskDependency.objects.using(db)
+            .filter(task_id=task.pk, depends_on_id=depends_on.pk)
+            .delete()
+        )
+        if deleted and is_blocking(depends_on):
+            Task.all_objects.using(db).filter(pk=task.pk).update(
+                blocked_by_count=F("blocked_by_count") - 1
+            )
+
+
+def set_dependencies(task, depends_on):
+    """
+    Replaces the dependencies of task with the tasks in depends_on """
+    wanted = {other.pk: other for other in depends_on}
+    current = set(task.dependencies.values_list("depends_on_id", flat=True))
+    for pk in current - wanted.keys():
+        remove_dependency(task, Task(pk=pk))
+    for pk in wanted.keys() - current:
+        add_dependency(task, wanted[pk])
+
+
+def previous_task(task, user):
+    """
+    The task that has to be completed before task can be worked on: the one
+    assigned to user just before it. None for tasks with dependencies, which
+    are ordered by those instead """
+    if task.dependencies.exists():
+        return None
+    return Task.objects.filter(id__lt=task.id, assigned_to=user).last()
+
+
+def ready_tasks(queryset):
+    """
+    The open tasks of queryset that can be worked on now: not blocked, and
+    either with dependencies or with their previous_task completed """
+    previous_complete = Subquery(
+        Task.objects.filter(id__lt=OuterRef("id"), assigned_to=OuterRef("assigned_to"))
+        .order_by("-id")
+        .values("complete")[:1]
+    )
+    # a task without a previous task is free to start
+    previous_complete = Coalesce(previous_complete, Value(True))
+    return (
+        queryset.filter(complete=False, blocked_by_count=0)
+        .annotate(
+            has_dependencies=Exists(
+                TaskDependency.objects.filter(task_id=OuterRef("id"))
+            ),
+            previous_complete=previous_complete,
+        )
+        .filter(Q(has_dependencies=True) | Q(previous_complete=True))
+    )
+
+
+def update_dependents(task, before, after):
+    """
+    Adjusts the blocked counters of the tasks depending on task after it was
+    completed, reopened, deleted or restored. before and after are
+    taskapp.stats snapshots """
+    delta = is_blocking(after) - is_blocking(before)
+    if not delta:
+        return
+    db = database_for(task)
+    Task.all_objects.using(db).filter(
+        id__in=TaskDependency.objects.using(db)
+        .filter(depends_on_id=task.pk)
+        .values("task_id")
+    ).update(blocked_by_count=F("blocked_by_count") + delta)
+
+
+def refresh_blocked_counts(queryset):
+    """
+    Recomputes blocked_by_count of the tasks in queryset from the dependency
+    edges. Returns the number of tasks whose count was wrong """
+    fixed = 0
+    counts = queryset.annotate(
+        actual=Count(
+            "dependencies",
+            filter=Q(
+                dependencies__depends_on__complete=False,
+                dependencies__depends_on__deleted_at__isnull=True,
+            ),
+        )
+    ).values_list("id", "blocked_by_count", "actual")
+    for task_id, cached, actual in counts.iterator():
+        if cached != actual:
+            queryset.model.all_objects.using(queryset.db).filter(id=task_id).update(
+                blocked_by_count=actual
+            )
+            fixed += 1
+    return fixed
+
+
+def update_dependents_bulk(changes):
+    """
+    update_dependents for a list of (task, before, after) tuples, using one
+    query to read the affected edges and one update per distinct delta """
+    deltas = {
+        task.pk: is_blocking(after) - is_blocking(before)
+        for task, before, after in changes
+    }
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    db = database_for(changes[0][0])
+    dependents = Counter()
+    edges = TaskDependency.objects.using(db).filter(depends_on_id__in=deltas)
+    for task_id, depends_on_id in edges.values_list("task_id", "depends_on_id"):
+        dependents[task_id] += deltas[depends_on_id]
+    by_delta = defaultdict(list)
+    for task_id, delta in dependents.items():
+        if delta:
+            by_delta[delta].append(task_id)
+    for delta, task_ids in by_delta.items():
+        Task.all_objects.using(db).filter(id__in=task_ids).update(
+            blocked_by_count=F("blocked_by_count") + delta
+        )
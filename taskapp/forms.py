@@ -1,6 +1,15 @@
 from django import forms
+from django.db.models import Q
 
-from .models import Comment, Task, User
+from .dependencies import check_dependency
+from .models import (
+    PRIORITY_CHOICES,
+    PRIORITY_NAMES,
+    PRIORITY_RANKS,
+    Comment,
+    Task,
+    User,
+)
 
 
 class RegistrationForm(forms.ModelForm):
@@ -40,11 +49,43 @@ class TaskForm(forms.ModelForm):
     assigned_to = forms.ModelChoiceField(
         queryset=User.objects.all(), empty_label="Select who to assign the task"
     )
+    # submitted as "high", "medium" or "low" and saved as the rank
+    priority = forms.TypedChoiceField(
+        choices=[(PRIORITY_NAMES[rank], label) for rank, label in PRIORITY_CHOICES],
+        coerce=PRIORITY_RANKS.get,
+        initial="high",
+    )
+    # saved by the view with taskapp.dependencies.set_dependencies
+    depends_on = forms.ModelMultipleChoiceField(
+        queryset=Task.objects.none(), required=False
+    )
 
     class Meta:
         model = Task
         fields = ("title", "description", "due_date", "assigned_to", "priority")
 
+    # only members of the workspace can be assigned
+    def __init__(self, *args, workspace=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["assigned_to"].queryset = User.objects.filter(workspace=workspace)
+        # finished tasks never block, so only open ones are offered
+        depends_on = Q(complete=False)
+        if self.instance.pk:
+            current = self.instance.dependencies.values_list("depends_on_id", flat=True)
+            self.initial["priority"] = PRIORITY_NAMES.get(self.instance.priority)
+            self.initial["depends_on"] = list(current)
+            depends_on = (depends_on | Q(pk__in=current)) & ~Q(pk=self.instance.pk)
+        self.fields["depends_on"].queryset = Task.objects.filter(
+            depends_on, workspace=workspace
+        )
+
+    def clean_depends_on(self):
+        depends_on = self.cleaned_data["depends_on"]
+        if self.instance.pk:
+            for other in depends_on:
+                check_dependency(self.instance, other)
+        return depends_on
+
 
 class MyTaskForm(forms.ModelForm):
     class Meta:
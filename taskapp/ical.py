@@ -0,0 +1,139 @@
+import secrets
+from datetime import timedelta, timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import PRIORITY_HIGH, PRIORITY_LOW, Task
+
+# RFC 5545 priorities, 1 is the highest and 9 the lowest
+ICAL_PRIORITIES = {PRIORITY_HIGH: 1, PRIORITY_LOW: 9}
+ICAL_DEFAULT_PRIORITY = 5
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def version_key(user_id):
+    return f"calendar:version:{user_id}"
+
+
+def feed_key(user_id, version):
+    return f"calendar:feed:{user_id}:{version}"
+
+
+def event_key(task_id, modified):
+    return f"calendar:event:{task_id}:{modified.timestamp()}"
+
+
+def calendar_version(user_id):
+    """
+    The version of the feed of a user, it changes whenever one of their tasks
+    does and doubles as the ETag of the feed """
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = secrets.token_hex(8)
+        # another request may have set it first
+        if not cache.add(version_key(user_id), version, CACHE_TIMEOUT):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+def invalidate_calendars(user_ids):
+    # a fresh random version rather than a counter, so a flushed cache cannot
+    # hand out a version a client has already seen
+    cache.set_many(
+        {
+            version_key(user_id): secrets.token_hex(8)
+            for user_id in user_ids
+            if user_id is not None
+        },
+        CACHE_TIMEOUT,
+    )
+
+
+def escape_text(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    # content lines are limited to 75 octets, continuations start with a space
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts = []
+    while data:
+        size = 75 if not parts else 74
+        # never cut a multi-byte character in half
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size].decode())
+        data = data[size:]
+    return "\r\n ".join(parts)
+
+
+def render_event(task):
+    modified = task["modified"].astimezone(timezone.utc)
+    due_date = task["due_date"]
+    priority = ICAL_PRIORITIES.get(task["priority"], ICAL_DEFAULT_PRIORITY)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:task-{task['id']}@taskapp",
+        f"DTSTAMP:{modified:%Y%m%dT%H%M%SZ}",
+        # all day events, DTEND is exclusive
+        f"DTSTART;VALUE=DATE:{due_date:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{due_date + timedelta(days=1):%Y%m%d}",
+        "SUMMARY:" + escape_text(task["title"]),
+        f"PRIORITY:{priority}",
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT",
+    ]
+    return "".join(fold(line) + "\r\n" for line in lines)
+
+
+def render_calendar(user):
+    """
+    The iCalendar document with the open tasks assigned to or by user. Each
+    event is cached under the task's modification time, so after a change only
+    the tasks that changed are rendered again """
+    tasks = list(
+        Task.objects.filter(
+            Q(assigned_to=user) | Q(assigned_by=user), complete=False
+        )
+        .order_by("due_date", "id")
+        .values("id", "title", "due_date", "priority", "modified")
+    )
+    keys = [event_key(task["id"], task["modified"]) for task in tasks]
+    events = cache.get_many(keys)
+    missing = {}
+    for key, task in zip(keys, tasks):
+        if key not in events:
+            missing[key] = events[key] = render_event(task)
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT)
+    return "".join(
+        [
+            "BEGIN:VCALENDAR\r\n",
+            "VERSION:2.0\r\n",
+            "PRODID:-//taskapp//Task due dates//EN\r\n",
+            "X-WR-CALNAME:Tasks\r\n",
+            *(events[key] for key in keys),
+            "END:VCALENDAR\r\n",
+        ]
+    )
+
+
+def calendar_feed(user, version):
+    """
+    The rendered feed of user for the given version, from the cache if it
+    was built before """
+    key = feed_key(user.pk, version)
+    body = cache.get(key)
+    if body is None:
+        body = render_calendar(user)
+        cache.set(key, body, CACHE_TIMEOUT)
+    return body
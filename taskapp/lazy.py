@@ -0,0 +1,36 @@
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """
+    A view callable that imports the class based view at dotted_path the first
+    time it is called, so loading the URLconf does not import every view and
+    its dependencies """
+
+    def __init__(self, dotted_path, **initkwargs):
+        self.dotted_path = dotted_path
+        self.initkwargs = initkwargs
+        self._view = None
+
+    def resolve(self):
+        if self._view is None:
+            view_class = import_string(self.dotted_path)
+            self._view = view_class.as_view(**self.initkwargs)
+        return self._view
+
+    def __getattr__(self, name):
+        # the attributes as_view() sets, e.g. csrf_exempt, which the
+        # middleware reads off the callback before it is called
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __call__(self, request, *args, **kwargs):
+        return self.resolve()(request, *args, **kwargs)
+
+    def __repr__(self):
+        return f"<LazyView {self.dotted_path}>"
+
+
+def lazy_view(dotted_path, **initkwargs):
+    return LazyView(dotted_path, **initkwargs)
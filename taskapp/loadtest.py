@@ -0,0 +1,375 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from django.contrib.auth.hashers import make_password
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+    get_internal_wsgi_application,
+)
+from django.urls import reverse
+
+from .models import PRIORITY_CHOICES, Task, User
+
+try:
+    import uvicorn
+except ImportError:  # uvicorn is optional, the WSGI server is always available
+    uvicorn = None
+
+SEED_EMAIL = "loadtest-{}@example.com"
+SEED_PASSWORD = "loadtest"
+DEFAULT_MIX = {
+    "task_list": 30,
+    "my_tasks": 15,
+    "all_tasks": 10,
+    "detail": 20,
+    "search": 10,
+    "create": 5,
+    "update": 10,
+}
+
+
+def parse_mix(value):
+    """
+    Parses a traffic mix like "task_list=30,detail=20", the weights are
+    relative """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown endpoint '{name}'")
+        mix[name] = int(weight)
+        if mix[name] < 0:
+            raise ValueError(f"Negative weight for '{name}'")
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one positive weight")
+    return mix
+
+
+def seed(users, tasks_per_user):
+    """
+    Creates users loadtest-0@example.com ... sharing one password, each
+    having assigned tasks_per_user tasks to the other users. Returns the
+    seeded users """
+    password = make_password(SEED_PASSWORD)
+    User.objects.bulk_create_users(
+        (
+            {"email": SEED_EMAIL.format(index), "password_hash": password}
+            for index in range(users)
+        ),
+        workers=1,
+    )
+    seeded = list(
+        User.objects.filter(
+            email__in=[SEED_EMAIL.format(index) for index in range(users)]
+        ).order_by("id")
+    )
+    rng = random.Random(0)
+    today = date.today()
+    Task.objects.bulk_create(
+        Task(
+            title=f"Load test task {index}",
+            description="generated by the loadtest command",
+            due_date=today + timedelta(days=rng.randint(-30, 60)),
+            assigned_by=user,
+            assigned_to=rng.choice(seeded),
+            priority=rng.choice(PRIORITY_CHOICES)[0],
+        )
+        for user in seeded
+        for index in range(tasks_per_user)
+    )
+    return seeded
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(kind="wsgi", host="127.0.0.1", port=0):
+    """
+    Serves the project in a background thread. Returns the bound (host, port)
+    and a function stopping the server """
+    if kind == "wsgi":
+        server = ThreadedWSGIServer((host, port), QuietRequestHandler)
+        server.set_app(get_internal_wsgi_application())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+
+        return server.server_address[:2], stop
+
+    if kind == "asgi":
+        if uvicorn is None:
+            raise RuntimeError("The ASGI server needs uvicorn to be installed")
+        from django.core.asgi import get_asgi_application
+
+        config = uvicorn.Config(
+            get_asgi_application(), host=host, port=port, log_level="warning"
+        )
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        bound = server.servers[0].sockets[0].getsockname()[:2]
+
+        def stop():
+            server.should_exit = True
+            thread.join()
+
+        return bound, stop
+
+    raise ValueError(f"Unknown server '{kind}'")
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def location(self):
+        return self.headers["location"][0] if self.headers["location"] else ""
+
+
+class Client:
+    """
+    A minimal asyncio HTTP/1.1 client keeping the cookies of one user. Every
+    request uses its own connection, like a browser without keep-alive """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cookies = SimpleCookie()
+
+    async def request(self, method, path, data=None):
+        body = urlencode(data, doseq=True).encode() if data is not None else b""
+        headers = {
+            "Host": f"{self.host}:{self.port}",
+            "Connection": "close",
+            "Content-Length": str(len(body)),
+        }
+        if data is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        if self.cookies:
+            headers["Cookie"] = "; ".join(
+                f"{name}={morsel.value}" for name, morsel in self.cookies.items()
+            )
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(head.encode("latin-1") + b"\r\n" + body)
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        response_headers = defaultdict(list)
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()].append(value.strip())
+        for cookie in response_headers["set-cookie"]:
+            self.cookies.load(cookie)
+        return Response(status, response_headers, body)
+
+    def csrf_token(self):
+        # the cookie holds the unmasked secret, which the form field accepts
+        return self.cookies["csrftoken"].value if "csrftoken" in self.cookies else ""
+
+    async def post(self, path, data):
+        return await self.request(
+            "POST", path, {**data, "csrfmiddlewaretoken": self.csrf_token()}
+        )
+
+    async def login(self, email, password):
+        await self.request("GET", reverse("login"))
+        response = await self.post(
+            reverse("login"), {"email": email, "password": password}
+        )
+        if response.status != 302:
+            raise RuntimeError(f"Login of {email} failed with {response.status}")
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of sorted values """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, duration):
+        """
+        One row per endpoint plus a total: request and error counts,
+        requests per second and latency percentiles in milliseconds """
+        rows = []
+        everything = []
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            everything += values
+            rows.append(self.row(endpoint, values, self.errors[endpoint], duration))
+        rows.append(
+            self.row("total", sorted(everything), sum(self.errors.values()), duration)
+        )
+        return rows
+
+    @staticmethod
+    def row(endpoint, values, errors, duration):
+        return {
+            "endpoint": endpoint,
+            "requests": len(values),
+            "errors": errors,
+            "rps": len(values) / duration if duration else 0.0,
+            "p50": percentile(values, 50) * 1000,
+            "p95": percentile(values, 95) * 1000,
+            "p99": percentile(values, 99) * 1000,
+        }
+
+
+def plan_users(users):
+    """
+    What each virtual user needs to know about the seeded data, read before
+    the event loop starts because the ORM is synchronous """
+    plans = []
+    for user in users:
+        plans.append(
+            {
+                "email": user.email,
+                "task_ids": list(
+                    Task.objects.filter(assigned_by=user).values_list("id", flat=True)
+                ),
+                # the first task of a user never waits for a previous one
+                "own_task_id": Task.objects.filter(assigned_to=user)
+                .order_by("id")
+                .values_list("id", flat=True)
+                .first(),
+            }
+        )
+    return plans
+
+
+class VirtualUser:
+    """
+    A logged in synthetic user picking endpoints according to the mix """
+
+    def __init__(self, client, plan, user_ids, mix, rng):
+        self.client = client
+        self.email = plan["email"]
+        self.task_ids = plan["task_ids"]
+        self.own_task_id = plan["own_task_id"]
+        self.user_ids = user_ids
+        self.mix = mix
+        self.rng = rng
+        self.status = "completed"
+
+    async def setup(self):
+        await self.client.login(self.email, SEED_PASSWORD)
+
+    async def task_list(self):
+        return await self.client.request("GET", reverse("home"))
+
+    async def my_tasks(self):
+        return await self.client.request("GET", reverse("my_task"))
+
+    async def all_tasks(self):
+        return await self.client.request("GET", reverse("all_task"))
+
+    async def detail(self):
+        path = reverse("task_detail", args=[self.rng.choice(self.task_ids)])
+        return await self.client.request("GET", path)
+
+    async def search(self):
+        keyword = self.rng.choice(["inprogress", "completed", "2024"])
+        return await self.client.request(
+            "GET", f"{reverse('search')}?{urlencode({'keyword': keyword})}"
+        )
+
+    async def create(self):
+        return await self.client.post(
+            reverse("create_task"),
+            {
+                "title": "Load test task",
+                "description": "created by the loadtest command",
+                "due_date": date.today().isoformat(),
+                "assigned_to": self.rng.choice(self.user_ids),
+                "priority": "medium",
+            },
+        )
+
+    async def update(self):
+        if self.own_task_id is None:
+            return await self.my_tasks()
+        self.status = "inprogress" if self.status == "completed" else "completed"
+        return await self.client.post(
+            reverse("update_mytask", args=[self.own_task_id]), {"status": self.status}
+        )
+
+    async def run(self, stats, deadline):
+        endpoints = list(self.mix)
+        weights = [self.mix[endpoint] for endpoint in endpoints]
+        while time.perf_counter() < deadline:
+            endpoint = self.rng.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(self, endpoint)()
+                # a lost session sends every page to the login form
+                ok = response.status < 400 and not response.location.startswith(
+                    reverse("login")
+                )
+            except (OSError, ValueError, IndexError):
+                ok = False
+            stats.record(endpoint, time.perf_counter() - start, ok)
+
+
+async def drive(host, port, plans, user_ids, mix, duration, seed_value=0):
+    """
+    Logs every planned user in and lets them send requests for duration
+    seconds. Returns the Stats and the measured duration """
+    rng = random.Random(seed_value)
+    virtual_users = [
+        VirtualUser(
+            Client(host, port), plan, user_ids, mix, random.Random(rng.random())
+        )
+        for plan in plans
+    ]
+    # logging in hashes passwords, it is not part of the measurement
+    for virtual_user in virtual_users:
+        await virtual_user.setup()
+    stats = Stats()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            virtual_user.run(stats, start + duration)
+            for virtual_user in virtual_users
+        )
+    )
+    return stats, time.perf_counter() - start
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from taskapp.archive import archive_completed_tasks
+from taskapp.routers import workspace_databases
+
+
+class Command(BaseCommand):
+    help = "Move completed tasks and their comments into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Archive tasks completed more than this many days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of tasks moved per transaction",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        total = 0
+        for _ in workspace_databases():
+            total += archive_completed_tasks(cutoff, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} task(s)"))
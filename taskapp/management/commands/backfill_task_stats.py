@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+from taskapp.models import (
+    ArchivedTask,
+    DailyTaskStats,
+    DueDateStats,
+    Task,
+    UserTaskStats,
+)
+from taskapp.routers import workspace_databases
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the dashboard aggregate tables from the Task and ArchivedTask "
+        "tables. The completion day of existing tasks is taken from their last "
+        "modification."
+    )
+
+    def handle(self, *args, **options):
+        users = defaultdict(lambda: {"open_count": 0, "completed_count": 0})
+        days = defaultdict(lambda: {"created_count": 0, "completed_count": 0})
+        due_dates = []
+
+        for db in workspace_databases():
+            # the archive is on default only
+            models = (Task, ArchivedTask) if db == DEFAULT_DB_ALIAS else (Task,)
+            for model in models:
+                self.count(model, users, days)
+            due_dates += (
+                Task.objects.filter(complete=False)
+                .values("workspace", "due_date")
+                .annotate(count=Count("id"))
+            )
+
+        with transaction.atomic():
+            UserTaskStats.objects.all().delete()
+            DailyTaskStats.objects.all().delete()
+            DueDateStats.objects.all().delete()
+            UserTaskStats.objects.bulk_create(
+                UserTaskStats(workspace_id=workspace_id, user_id=user_id, **counts)
+                for (workspace_id, user_id), counts in users.items()
+            )
+            DailyTaskStats.objects.bulk_create(
+                DailyTaskStats(workspace_id=workspace_id, day=day, **counts)
+                for (workspace_id, day), counts in days.items()
+            )
+            DueDateStats.objects.bulk_create(
+                DueDateStats(
+                    workspace_id=row["workspace"],
+                    due_date=row["due_date"],
+                    open_count=row["count"],
+                )
+                for row in due_dates
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt statistics for {len(users)} user(s) and {len(days)} day(s)"
+            )
+        )
+
+    def count(self, model, users, days):
+        for row in (
+            model.objects.filter(assigned_to__isnull=False)
+            .values("workspace", "assigned_to")
+            .annotate(
+                open=Count("id", filter=Q(complete=False)),
+                completed=Count("id", filter=Q(complete=True)),
+            )
+        ):
+            key = (row["workspace"], row["assigned_to"])
+            users[key]["open_count"] += row["open"]
+            users[key]["completed_count"] += row["completed"]
+        for row in (
+            model.objects.annotate(day=TruncDate("created"))
+            .values("workspace", "day")
+            .annotate(count=Count("id"))
+        ):
+            days[(row["workspace"], row["day"])]["created_count"] += row["count"]
+        for row in (
+            model.objects.filter(complete=True)
+            .annotate(day=TruncDate("modified"))
+            .values("workspace", "day")
+            .annotate(count=Count("id"))
+        ):
+            days[(row["workspace"], row["day"])]["completed_count"] += row["count"]
@@ -0,0 +1,138 @@
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from taskapp.models import PRIORITY_CHOICES, STATUS_CHOICES, Task, User
+from taskapp.rows import task_rows
+
+SEED_EMAIL = "benchmark-{}@example.com"
+
+
+def load_models(queryset):
+    # what the list views did before, users are needed for their names
+    return list(queryset.prefetch_related("assigned_to", "assigned_by"))
+
+
+LOADERS = {"models": load_models, "rows": task_rows}
+
+
+def seed(tasks, users=20, batch_size=5000):
+    """
+    Creates users and tasks with descriptions of the maximum length, so the
+    model instances carry the column the rows leave out """
+    User.objects.bulk_create(
+        User(email=SEED_EMAIL.format(index), password="!") for index in range(users)
+    )
+    seeded = list(User.objects.filter(email__startswith="benchmark-"))
+    rng = random.Random(0)
+    today = date.today()
+    Task.objects.bulk_create(
+        (
+            Task(
+                title=f"Benchmark task {index}",
+                description="x" * 100,
+                due_date=today + timedelta(days=rng.randint(-30, 60)),
+                assigned_by=rng.choice(seeded),
+                assigned_to=rng.choice(seeded),
+                priority=rng.choice(PRIORITY_CHOICES)[0],
+                status=rng.choice(STATUS_CHOICES)[0],
+            )
+            for index in range(tasks)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def measure(load, queryset, repeat=3):
+    """
+    Loads queryset with load repeat times. Returns the best time in seconds,
+    the peak and the retained memory in bytes and the number of objects """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        objects = load(queryset.all())
+        best = min(best, time.perf_counter() - start)
+        del objects
+    # a separate run, tracemalloc slows allocations down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = load(queryset.all())
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak": peak, "retained": retained, "count": len(objects)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare loading a page of tasks as model instances with loading it as "
+        "TaskRow projections, in time and memory, on a freshly seeded test "
+        "database. Your own database is never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tasks", type=int, default=100_000, help="Number of seeded tasks"
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=100_000,
+            help="Number of tasks loaded at once",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Timed runs, the best one counts"
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true", help="Keep the test database afterwards"
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON")
+
+    def handle(self, *args, **options):
+        if options["tasks"] < 1 or options["page_size"] < 1:
+            raise CommandError("--tasks and --page-size have to be positive")
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            if not Task.objects.exists():
+                seed(options["tasks"])
+            queryset = Task.objects.order_by("-priority", "due_date", "id")[
+                : options["page_size"]
+            ]
+            results = {
+                name: measure(load, queryset, options["repeat"])
+                for name, load in LOADERS.items()
+            }
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'loader':<8} {'tasks':>8} {'seconds':>9} {'tasks/s':>10} "
+            f"{'peak MiB':>9} {'kept MiB':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<8} {result['count']:>8} {result['seconds']:>9.3f} "
+                f"{result['count'] / result['seconds']:>10.0f} "
+                f"{result['peak'] / 2**20:>9.1f} {result['retained'] / 2**20:>9.1f}"
+            )
+        models, rows = results["models"], results["rows"]
+        self.stdout.write(
+            f"rows use {rows['retained'] / models['retained']:.0%} of the memory "
+            f"and {rows['seconds'] / models['seconds']:.0%} of the time of models"
+        )
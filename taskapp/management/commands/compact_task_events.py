@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, Min, OuterRef, Q
+from django.utils import timezone
+
+from taskapp.models import TaskEvent, WebhookEndpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove change log events that were superseded by a later event for "
+        "the same object. The latest event of every object is always kept, so "
+        "clients syncing from any token still end up with the current state."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Only compact events older than this many days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Maximum number of events removed by a single DELETE",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        newer_event = TaskEvent.objects.filter(
+            model=OuterRef("model"),
+            object_id=OuterRef("object_id"),
+            id__gt=OuterRef("id"),
+        )
+
+        def seen_by(user):
+            # a later event of the object that the user also sees
+            user = OuterRef(user)
+            return Exists(
+                newer_event.filter(Q(assigned_to=user) | Q(assigned_by=user))
+            )
+
+        # an event only goes once both its users see a later one, so a task's
+        # previous assignee keeps the events up to the task's "revoked" event
+        superseded = TaskEvent.objects.filter(
+            Q(assigned_to__isnull=True) | seen_by("assigned_to"),
+            Q(assigned_by__isnull=True) | seen_by("assigned_by"),
+            created__lt=cutoff,
+        )
+        # keep the events of a workspace that one of its active webhook
+        # endpoints has not received yet
+        cursors = (
+            WebhookEndpoint.objects.filter(is_active=True)
+            .order_by()
+            .values("workspace")
+            .annotate(first=Min("last_event_id"))
+        )
+        for cursor in cursors:
+            superseded = superseded.exclude(
+                workspace=cursor["workspace"], id__gt=cursor["first"]
+            )
+        removed = 0
+        while True:
+            ids = list(
+                superseded.order_by("id").values_list("id", flat=True)[
+                    : options["batch_size"]
+                ]
+            )
+            if not ids:
+                break
+            removed += TaskEvent.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} event(s)"))
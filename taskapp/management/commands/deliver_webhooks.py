@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from taskapp.webhooks import ConnectionPool, deliver_due
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver task events to the webhook endpoints of their workspace, in "
+        "signed batches with retries. Runs until stopped, several workers may "
+        "run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Deliver what is due once and exit"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when nothing was delivered",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Events per request"
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=10, help="Seconds per request"
+        )
+
+    def handle(self, *args, **options):
+        pool = ConnectionPool(timeout=options["timeout"])
+        try:
+            while True:
+                delivered = deliver_due(pool, options["batch_size"])
+                if delivered:
+                    self.stdout.write(f"Delivered {delivered} event(s)")
+                if options["once"]:
+                    break
+                if not delivered:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.close()
@@ -0,0 +1,73 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taskapp.models import User, Workspace
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV file with an email column and optional "
+        "first_name, last_name, password or password_hash columns. Existing "
+        "emails are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file", help="Path of the CSV file, - for stdin")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users inserted per batch",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of processes hashing passwords, defaults to the CPU count",
+        )
+        parser.add_argument(
+            "--workspace", help="Slug of the workspace the users are added to"
+        )
+
+    def handle(self, *args, **options):
+        extra_fields = {}
+        if options["workspace"]:
+            workspace = Workspace.objects.filter(slug=options["workspace"]).first()
+            if workspace is None:
+                raise CommandError(f"Workspace {options['workspace']} does not exist")
+            extra_fields["workspace"] = workspace
+
+        if options["csv_file"] == "-":
+            created, duplicates, invalid = self.import_rows(
+                sys.stdin, options, extra_fields
+            )
+        else:
+            with open(options["csv_file"], newline="", encoding="utf-8") as f:
+                created, duplicates, invalid = self.import_rows(
+                    f, options, extra_fields
+                )
+
+        for email in duplicates:
+            self.stdout.write(f"Skipped duplicate {email}")
+        for number in invalid:
+            # the header is line 1
+            self.stderr.write(f"Skipped line {number + 1}, it has no email")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} user(s), skipped {len(duplicates)} duplicate(s)"
+                f" and {len(invalid)} row(s) without an email"
+            )
+        )
+
+    def import_rows(self, f, options, extra_fields):
+        reader = csv.DictReader(f)
+        if "email" not in (reader.fieldnames or []):
+            raise CommandError("The CSV file needs an email column")
+        return User.objects.bulk_create_users(
+            reader,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            **extra_fields,
+        )
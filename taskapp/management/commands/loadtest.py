@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from taskapp.loadtest import (
+    DEFAULT_MIX,
+    drive,
+    parse_mix,
+    plan_users,
+    seed,
+    start_server,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the project under a local WSGI or ASGI server against a freshly "
+        "seeded test database, drive it with concurrent synthetic users and "
+        "report throughput and p50/p95/p99 latency per endpoint. Your own "
+        "database is never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            choices=["wsgi", "asgi"],
+            default="wsgi",
+            help="asgi needs uvicorn to be installed",
+        )
+        parser.add_argument(
+            "--users", type=int, default=20, help="Number of concurrent users"
+        )
+        parser.add_argument(
+            "--tasks-per-user",
+            type=int,
+            default=50,
+            help="Tasks every seeded user has assigned",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds of load"
+        )
+        parser.add_argument(
+            "--mix",
+            default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+            help="Relative weights of the endpoints",
+        )
+        parser.add_argument(
+            "--keep-rate-limits",
+            action="store_true",
+            help="Apply RATE_LIMITS, by default they are off as all users share one IP",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true", help="Keep the test database afterwards"
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(e)
+        if options["users"] < 1:
+            raise CommandError("At least one user is needed")
+
+        overrides = {
+            "DEBUG": False,
+            # no mail is sent for the created and updated tasks
+            "EMAIL_BACKEND": "django.core.mail.backends.dummy.EmailBackend",
+            "ALLOWED_HOSTS": ["127.0.0.1", "localhost"],
+        }
+        if not options["keep_rate_limits"]:
+            overrides["RATE_LIMITS"] = {}
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            with override_settings(**overrides):
+                users = seed(options["users"], options["tasks_per_user"])
+                plans = plan_users(users)
+                (host, port), stop = start_server(options["server"])
+                try:
+                    stats, duration = asyncio.run(
+                        drive(
+                            host,
+                            port,
+                            plans,
+                            [user.id for user in users],
+                            mix,
+                            options["duration"],
+                        )
+                    )
+                finally:
+                    stop()
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+
+        rows = stats.report(duration)
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(
+            f"{options['users']} users, {duration:.1f}s, {options['server']} server\n"
+        )
+        self.stdout.write(
+            f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<12} {row['requests']:>9} {row['errors']:>7} "
+                f"{row['rps']:>8.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+                f"{row['p99']:>8.1f}"
+            )
@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter so nothing is imported yet
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+warm_up = {warm_up}
+if warm_up:
+    from taskapp.warmup import warm_up
+    warm_up()
+end = time.perf_counter()
+print(json.dumps({{"setup": setup - start, "warm_up": end - setup, "total": end - start}}))
+"""
+
+
+def measure_startup(warm_up=True, importtime=False):
+    """
+    Starts a new interpreter that sets up django, and warms the project up when
+    warm_up is set. Returns the timings in seconds and the -X importtime report
+    as a list of (self_us, cumulative_us, module) tuples """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", STARTUP_SCRIPT.format(warm_up=bool(warm_up))]
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "taskproject.settings")
+    result = subprocess.run(
+        command, capture_output=True, text=True, env=env, cwd=settings.BASE_DIR
+    )
+    if result.returncode:
+        raise CommandError(f"Startup failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+
+def parse_importtime(output):
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        imports.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long a fresh process takes to set up django and warm up, "
+        "and list the slowest imports. Fails when STARTUP_BUDGET_SECONDS is "
+        "exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of imports listed, ordered by cumulative time",
+        )
+        parser.add_argument(
+            "--no-warm-up",
+            action="store_false",
+            dest="warm_up",
+            help="Only measure django.setup(), skip loading views and templates",
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=None,
+            help="Seconds allowed, defaults to STARTUP_BUDGET_SECONDS",
+        )
+
+    def handle(self, *args, **options):
+        budget = options["budget"]
+        if budget is None:
+            budget = getattr(settings, "STARTUP_BUDGET_SECONDS", None)
+
+        timings, imports = measure_startup(options["warm_up"], importtime=True)
+
+        self.stdout.write(f"{'self [ms]':>10} {'cumulative [ms]':>16}  module")
+        imports.sort(key=lambda row: row[1], reverse=True)
+        for self_us, cumulative_us, module in imports[: options["top"]]:
+            self.stdout.write(
+                f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}  {module}"
+            )
+        self.stdout.write(
+            f"\n{len(imports)} modules imported\n"
+            f"django.setup(): {timings['setup']:.3f}s\n"
+            f"warm up: {timings['warm_up']:.3f}s\n"
+            f"total: {timings['total']:.3f}s"
+        )
+        # -X importtime slows imports down, the budget is checked on a clean run
+        if budget is not None:
+            timings, _ = measure_startup(options["warm_up"])
+            if timings["total"] > budget:
+                raise CommandError(
+                    f"Startup took {timings['total']:.3f}s, the budget is {budget}s"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Startup took {timings['total']:.3f}s, within the {budget}s budget"
+                )
+            )
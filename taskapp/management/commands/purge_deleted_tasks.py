@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from taskapp.attachments import delete_attachments
+from taskapp.models import Attachment, Comment, Task
+from taskapp.routers import workspace_databases
+
+
+class Command(BaseCommand):
+    help = "Permanently remove tasks that were deleted before the undo window"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Maximum number of rows removed by a single DELETE",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.TASK_UNDO_SECONDS)
+        purged = 0
+        for _ in workspace_databases():
+            purged += self.purge(cutoff, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} task(s)"))
+
+    def purge(self, cutoff, batch_size):
+        purged = 0
+        while True:
+            task_ids = list(
+                Task.all_objects.filter(deleted_at__lt=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not task_ids:
+                return purged
+            # comments first, in bounded chunks, so that no single statement
+            # has to cascade through a large thread
+            while True:
+                comment_ids = list(
+                    Comment.objects.filter(task_id__in=task_ids).values_list(
+                        "id", flat=True
+                    )[:batch_size]
+                )
+                if not comment_ids:
+                    break
+                Comment.objects.filter(id__in=comment_ids).delete()
+            # attachments do not cascade, they outlive archived tasks
+            delete_attachments(Attachment.objects.filter(task_id__in=task_ids))
+            Task.all_objects.filter(id__in=task_ids).delete()
+            purged += len(task_ids)
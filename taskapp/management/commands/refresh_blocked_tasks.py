@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from taskapp.dependencies import refresh_blocked_counts
+from taskapp.models import Task, TaskDependency
+from taskapp.routers import workspace_databases
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the cached blocked counters of tasks from the dependency "
+        "table, e.g. after editing dependencies by hand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            help="Only refresh the tasks on this database alias, default all",
+        )
+
+    def handle(self, *args, **options):
+        fixed = 0
+        for db in workspace_databases():
+            if options["database"] in (None, db):
+                fixed += self.refresh(db)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} task(s)"))
+
+    def refresh(self, db):
+        with_dependencies = TaskDependency.objects.using(db).values("task_id")
+        tasks = Task.all_objects.using(db).filter(
+            Q(blocked_by_count__gt=0) | Q(pk__in=with_dependencies)
+        )
+        return refresh_blocked_counts(tasks)
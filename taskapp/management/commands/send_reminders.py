@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from taskapp.reminders import send_reminders
+from taskapp.routers import workspace_databases
+
+
+class Command(BaseCommand):
+    help = (
+        "Email the assignees of tasks that are due soon or overdue. Meant to "
+        "run from cron, a reminder is never sent twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lead-days",
+            type=int,
+            default=1,
+            help="Remind about tasks due within this many days",
+        )
+        parser.add_argument(
+            "--lookback-days",
+            type=int,
+            default=7,
+            help="Ignore tasks that became overdue more than this many days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of emails sent per batch",
+        )
+
+    def handle(self, *args, **options):
+        for kind in ("due_soon", "overdue"):
+            sent = 0
+            for _ in workspace_databases():
+                sent += send_reminders(
+                    kind,
+                    lead_days=options["lead_days"],
+                    lookback_days=options["lookback_days"],
+                    batch_size=options["batch_size"],
+                )
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} {kind} reminder(s)"))
@@ -1,4 +1,11 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import BaseUserManager
+from django.db import models
 
 
 class CustomManager(BaseUserManager):
@@ -27,3 +34,90 @@ class CustomManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
 
         return self.create_user(email, password, **extra_fields)
+
+    def bulk_create_users(self, rows, batch_size=1000, workers=None, **extra_fields):
+        """
+        Create users from an iterable of dicts with an email, optional
+        first_name and last_name, and either a plain password or an already
+        hashed password_hash. Rows are consumed in batches of batch_size,
+        passwords are hashed in a pool of worker processes and existing
+        emails are skipped. Returns the number of users created, the list
+        of duplicate emails and the numbers, counting from 1, of the rows
+        skipped for having no email.
+        """
+        rows = enumerate(rows, 1)
+        workers = workers or os.cpu_count() or 1
+        created = 0
+        duplicates = []
+        invalid = []
+        seen = set()
+        # the workers need configured settings to know the password hasher
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                batch = []
+                for number, row in chunk:
+                    email = self.normalize_email((row.get("email") or "").strip())
+                    if not email:
+                        invalid.append(number)
+                        continue
+                    if email in seen:
+                        duplicates.append(email)
+                        continue
+                    seen.add(email)
+                    batch.append((email, row))
+
+                existing = set(
+                    self.filter(email__in=[email for email, _ in batch]).values_list(
+                        "email", flat=True
+                    )
+                )
+                duplicates.extend(email for email, _ in batch if email in existing)
+                batch = [(email, row) for email, row in batch if email not in existing]
+                if not batch:
+                    continue
+
+                plain = [row for _, row in batch if not row.get("password_hash")]
+                hashes = iter(
+                    pool.map(
+                        make_password,
+                        [row.get("password") or None for row in plain],
+                        chunksize=max(1, len(plain) // (workers * 4)),
+                    )
+                )
+                users = []
+                for email, row in batch:
+                    users.append(
+                        self.model(
+                            email=email,
+                            # short CSV rows have None for missing columns
+                            first_name=row.get("first_name") or "",
+                            last_name=row.get("last_name") or "",
+                            password=row.get("password_hash") or next(hashes),
+                            **extra_fields,
+                        )
+                    )
+                # ignore_conflicts covers users created concurrently
+                self.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+                # and drops them silently, a stored password tells which rows
+                # are ours, every hash has its own salt
+                passwords = {user.email: user.password for user in users}
+                stored = self.filter(email__in=passwords).values_list(
+                    "email", "password"
+                )
+                for email, password in stored:
+                    if passwords[email] == password:
+                        created += 1
+                    else:
+                        duplicates.append(email)
+        return created, duplicates, invalid
+
+
+class TaskManager(models.Manager):
+    """
+    Default manager for tasks, it hides soft deleted tasks """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
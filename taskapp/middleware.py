@@ -0,0 +1,151 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+from .routers import reset_active_workspace, set_active_workspace
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# content of these tags is whitespace sensitive and is left untouched
+PRESERVED_BLOCK_RE = _lazy_re_compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.IGNORECASE | re.DOTALL
+)
+WHITESPACE_RE = _lazy_re_compile(r"\s+")
+ACCEPTS_BR_RE = _lazy_re_compile(r"\bbr\b")
+
+
+def minify_html(html):
+    parts = PRESERVED_BLOCK_RE.split(html)
+    minified = []
+    # split() returns [text, block, tag name, text, block, tag name, ...]
+    for index in range(0, len(parts), 3):
+        # browsers render any run of whitespace as a single space
+        minified.append(WHITESPACE_RE.sub(" ", parts[index]))
+        if index + 1 < len(parts):
+            minified.append(parts[index + 1])
+    return "".join(minified).strip()
+
+
+def brotli_compress_sequence(sequence):
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def brotli_compress_async_sequence(sequence):
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class HTMLMinifyMiddleware(MiddlewareMixin):
+    """
+    A middleware that strips insignificant whitespace from rendered HTML """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if not response.get("Content-Type", "").startswith("text/html"):
+            return response
+        charset = response.charset or settings.DEFAULT_CHARSET
+        html = response.content.decode(charset)
+        response.content = minify_html(html).encode(charset)
+        if response.has_header("Content-Length"):
+            response.headers["Content-Length"] = str(len(response.content))
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    A middleware that compresses text responses with brotli when the client
+    accepts it and falls back to gzip otherwise. Responses smaller than
+    COMPRESSION_MIN_SIZE bytes are left alone, streaming responses are
+    compressed chunk by chunk """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "")
+        if response.has_header("Content-Encoding") or not content_type.startswith(
+            COMPRESSIBLE_TYPES
+        ):
+            return response
+        # byte ranges address the body as it is, compressing would shift them
+        if response.has_header("Accept-Ranges"):
+            return response
+        if not response.streaming and len(response.content) < getattr(
+            settings, "COMPRESSION_MIN_SIZE", 500
+        ):
+            return response
+
+        ae = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if brotli is None or not ACCEPTS_BR_RE.search(ae):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = brotli_compress_async_sequence(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = brotli_compress_sequence(
+                    response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = brotli.compress(
+                response.content, mode=brotli.MODE_TEXT
+            )
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # a strong ETag no longer matches the encoded body
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+
+        return response
+
+
+class WorkspaceMiddleware(MiddlewareMixin):
+    """
+    A middleware that makes the workspace of the logged in user the active
+    workspace for the request. It has to come after AuthenticationMiddleware """
+
+    def process_request(self, request):
+        workspace = None
+        if request.user.is_authenticated and request.user.workspace_id:
+            workspace = request.user.workspace
+        request.workspace = workspace
+        request._workspace_token = set_active_workspace(workspace)
+
+    def process_response(self, request, response):
+        token = getattr(request, "_workspace_token", None)
+        if token is not None:
+            reset_active_workspace(token)
+        return response
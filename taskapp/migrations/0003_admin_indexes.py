@@ -0,0 +1,29 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0002_remove_comment_updated_remove_task_updated_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created'], name='taskapp_com_created_8c6ecd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status'], name='taskapp_tas_status_a351dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority'], name='taskapp_tas_priorit_e79416_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date'], name='taskapp_tas_due_dat_f34a6c_idx'),
+        ),
+    ]
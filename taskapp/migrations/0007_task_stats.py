@@ -0,0 +1,44 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0006_task_event_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTaskStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('created_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DueDateStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField(unique=True)),
+                ('open_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserTaskStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-open_count'], name='taskapp_use_open_co_f8ccd8_idx')],
+            },
+        ),
+    ]
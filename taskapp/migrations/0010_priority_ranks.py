@@ -0,0 +1,29 @@
+from django.db import migrations
+
+PRIORITY_RANKS = {"high": "3", "medium": "2", "low": "1"}
+
+
+def names_to_ranks(apps, schema_editor):
+    # the column is still text here, 0011 converts it to an integer
+    for model_name in ("Task", "ArchivedTask"):
+        model = apps.get_model("taskapp", model_name)
+        for name, rank in PRIORITY_RANKS.items():
+            model.objects.filter(priority=name).update(priority=rank)
+
+
+def ranks_to_names(apps, schema_editor):
+    for model_name in ("Task", "ArchivedTask"):
+        model = apps.get_model("taskapp", model_name)
+        for name, rank in PRIORITY_RANKS.items():
+            model.objects.filter(priority=rank).update(priority=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0009_workspaces'),
+    ]
+
+    operations = [
+        migrations.RunPython(names_to_ranks, ranks_to_names),
+    ]
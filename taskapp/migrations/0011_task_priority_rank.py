@@ -0,0 +1,47 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0010_priority_ranks'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='taskapp_tas_priorit_e79416_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='taskapp_tas_workspa_dc6211_idx',
+        ),
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(3, 'High'), (2, 'Medium'), (1, 'Low')]),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(3, 'High'), (2, 'Medium'), (1, 'Low')], default=3),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['workspace', 'status', 'due_date'], name='taskapp_tas_workspa_83a804_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['workspace', '-priority', 'due_date'], name='task_ws_priority_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['assigned_by', '-priority', 'due_date'], name='task_live_by_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['assigned_to', 'complete', '-priority', 'due_date'], name='task_live_to_priority_idx'),
+        ),
+    ]
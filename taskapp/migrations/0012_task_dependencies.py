@@ -0,0 +1,52 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0011_task_priority_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='blocked_by_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('blocked_by_count', 0), ('complete', False), ('deleted_at__isnull', True)), fields=['assigned_to', '-priority', 'due_date'], name='task_ready_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='depends_on',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependents', to='taskapp.task'),
+        ),
+        migrations.AddField(
+            model_name='taskdependency',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dependencies', to='taskapp.task'),
+        ),
+        migrations.AddIndex(
+            model_name='taskdependency',
+            index=models.Index(fields=['depends_on', 'task'], name='taskapp_tas_depends_0201b3_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.UniqueConstraint(fields=('task', 'depends_on'), name='unique_task_dependency'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.CheckConstraint(check=models.Q(('task', models.F('depends_on')), _negated=True), name='task_dependency_not_self'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0013_user_calendar_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_comment_id', models.BigIntegerField(default=0)),
+                ('read_at', models.DateTimeField(auto_now=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='taskapp.task')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskreadmarker',
+            constraint=models.UniqueConstraint(fields=('user', 'task'), name='unique_task_read_marker'),
+        ),
+    ]
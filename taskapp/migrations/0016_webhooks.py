@@ -0,0 +1,52 @@
+# Generated by Django 4.2.17 on 2026-10-19 04:50
+
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+from django.db import migrations, models
+
+import taskapp.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0015_attachments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('url', models.URLField(max_length=500)),
+                ('secret', models.CharField(default=taskapp.models.new_webhook_secret, max_length=64)),
+                ('event_types', models.JSONField(blank=True, default=list)),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskevent',
+            name='workspace',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='taskapp.workspace'),
+        ),
+        migrations.AddIndex(
+            model_name='taskevent',
+            index=models.Index(fields=['workspace', 'id'], name='taskapp_tas_workspa_e69852_idx'),
+        ),
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='workspace',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='taskapp.workspace'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookendpoint',
+            index=models.Index(fields=['is_active', 'next_attempt_at'], name='taskapp_web_is_acti_902684_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.17 on 2026-10-19 05:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0018_task_event_revoked'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ReminderCursor',
+        ),
+    ]
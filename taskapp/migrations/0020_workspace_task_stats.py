@@ -0,0 +1,77 @@
+# Generated by Django 4.2.17 on 2026-10-19 05:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0019_remove_reminder_cursor'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usertaskstats',
+            name='taskapp_use_open_co_f8ccd8_idx',
+        ),
+        migrations.AddField(
+            model_name='dailytaskstats',
+            name='workspace',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='taskapp.workspace'),
+        ),
+        migrations.AddField(
+            model_name='duedatestats',
+            name='workspace',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='taskapp.workspace'),
+        ),
+        migrations.AddField(
+            model_name='usertaskstats',
+            name='workspace',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='taskapp.workspace'),
+        ),
+        migrations.AlterField(
+            model_name='dailytaskstats',
+            name='day',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='duedatestats',
+            name='due_date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='usertaskstats',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='usertaskstats',
+            index=models.Index(fields=['workspace', '-open_count'], name='taskapp_use_workspa_fa1bb7_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailytaskstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('workspace__isnull', False)), fields=('workspace', 'day'), name='unique_daily_task_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailytaskstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('workspace__isnull', True)), fields=('day',), name='unique_daily_task_stats_default'),
+        ),
+        migrations.AddConstraint(
+            model_name='duedatestats',
+            constraint=models.UniqueConstraint(condition=models.Q(('workspace__isnull', False)), fields=('workspace', 'due_date'), name='unique_due_date_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='duedatestats',
+            constraint=models.UniqueConstraint(condition=models.Q(('workspace__isnull', True)), fields=('due_date',), name='unique_due_date_stats_default'),
+        ),
+        migrations.AddConstraint(
+            model_name='usertaskstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('workspace__isnull', False)), fields=('workspace', 'user'), name='unique_user_task_stats'),
+        ),
+        migrations.AddConstraint(
+            model_name='usertaskstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('workspace__isnull', True)), fields=('user',), name='unique_user_task_stats_default'),
+        ),
+    ]
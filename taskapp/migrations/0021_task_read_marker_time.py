@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-19 05:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0020_workspace_task_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='taskreadmarker',
+            name='last_read_comment_id',
+        ),
+        migrations.AlterField(
+            model_name='taskreadmarker',
+            name='read_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
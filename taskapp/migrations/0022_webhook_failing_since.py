@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0021_task_read_marker_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='failing_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.17 on 2026-10-19 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taskapp', '0022_webhook_failing_since'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_soon', 'Due soon'), ('overdue', 'Overdue')], max_length=20, unique=True)),
+                ('last_due_date', models.DateField()),
+                ('last_modified', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,13 +1,50 @@
+import secrets
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, models
+from django.utils import timezone
 from model_utils.models import TimeStampedModel
 
-from .manager import CustomManager
+from .manager import CustomManager, TaskManager
+
+
+class Workspace(TimeStampedModel):
+    """
+    A tenant. Users, tasks and comments belong to one workspace, rows without
+    a workspace form the shared default workspace. Tasks and comments of a
+    workspace are stored on the database alias named by db_alias """
+
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    db_alias = models.CharField(max_length=100, default="default")
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        database = settings.DATABASES.get(self.db_alias)
+        if database is None:
+            raise ValidationError({"db_alias": "There is no such database alias."})
+        # see taskapp.routers.reserve_id_range
+        if self.db_alias != DEFAULT_DB_ALIAS and not database.get("ID_OFFSET"):
+            raise ValidationError(
+                {"db_alias": "The database needs an ID_OFFSET in its settings."}
+            )
 
 
 class User(AbstractUser, TimeStampedModel):
     username = None
     email = models.EmailField(unique=True)
+    workspace = models.ForeignKey(
+        Workspace, on_delete=models.PROTECT, null=True, blank=True
+    )
+    # secret part of the calendar feed URL, calendar apps cannot log in
+    calendar_token = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
@@ -17,36 +54,541 @@ class User(AbstractUser, TimeStampedModel):
     def __str__(self):
         return self.email
 
+    def get_calendar_token(self):
+        if not self.calendar_token:
+            self.reset_calendar_token()
+        return self.calendar_token
 
-PRIORITY_CHOICES = [("high", "High"), ("low", "Low"), ("medium", "Medium")]
+    def reset_calendar_token(self):
+        self.calendar_token = secrets.token_urlsafe(32)
+        self.save(update_fields=["calendar_token"])
+
+
+# priorities are stored as ranks so they sort and index as small integers,
+# forms and query parameters keep using the names
+PRIORITY_LOW = 1
+PRIORITY_MEDIUM = 2
+PRIORITY_HIGH = 3
+PRIORITY_CHOICES = [
+    (PRIORITY_HIGH, "High"),
+    (PRIORITY_MEDIUM, "Medium"),
+    (PRIORITY_LOW, "Low"),
+]
+PRIORITY_RANKS = {"high": PRIORITY_HIGH, "medium": PRIORITY_MEDIUM, "low": PRIORITY_LOW}
+PRIORITY_NAMES = {rank: name for name, rank in PRIORITY_RANKS.items()}
 
 
 STATUS_CHOICES = [("inprogress", "Inprogress"), ("completed", "Completed")]
 
 
 class Task(TimeStampedModel):
+    # tasks may live on another database than users and workspaces (see
+    # taskapp.routers), so their references to them have no FK constraint
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
     title = models.CharField(max_length=50)
     description = models.TextField(max_length=100)
     due_date = models.DateField()
     assigned_to = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, related_name="assigned_task"
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="assigned_task",
+        db_constraint=False,
+    )
+    assigned_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False
     )
-    assigned_by = models.ForeignKey(User, on_delete=models.CASCADE)
     complete = models.BooleanField(default=False)
     assigned_at = models.DateField(auto_now_add=True)
-    priority = models.CharField(max_length=50, choices=PRIORITY_CHOICES, default="high")
+    priority = models.PositiveSmallIntegerField(
+        choices=PRIORITY_CHOICES, default=PRIORITY_HIGH
+    )
     status = models.CharField(
         max_length=50, choices=STATUS_CHOICES, default="inprogress"
     )
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    # number of unfinished tasks this one depends on, kept up to date by
+    # taskapp.dependencies so checking for a blocked task needs no graph walk
+    blocked_by_count = models.PositiveIntegerField(default=0)
+
+    objects = TaskManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        # used by the admin filters and date hierarchy
+        indexes = [
+            # tenant-leading indexes for the workspace scoped list views
+            models.Index(fields=["workspace", "assigned_by"]),
+            models.Index(fields=["workspace", "assigned_to"]),
+            models.Index(fields=["workspace", "status", "due_date"]),
+            models.Index(fields=["workspace", "due_date"]),
+            # the default list ordering, see taskapp.utils.TASK_SORT_DEFAULT
+            models.Index(
+                fields=["workspace", "-priority", "due_date"],
+                name="task_ws_priority_due_idx",
+            ),
+            models.Index(fields=["status"]),
+            # range scans by the admin date hierarchy and the reminder scheduler
+            models.Index(fields=["due_date", "complete"]),
+            # used by the archive_tasks command to find old completed tasks,
+            # and by the reminder scheduler to find changed open ones
+            models.Index(fields=["complete", "modified"]),
+            # the list views only ever read tasks that are not deleted
+            models.Index(
+                fields=["assigned_by"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="task_live_assigned_by_idx",
+            ),
+            models.Index(
+                fields=["assigned_to"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="task_live_assigned_to_idx",
+            ),
+            models.Index(
+                fields=["assigned_by", "-priority", "due_date"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="task_live_by_priority_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "complete", "-priority", "due_date"],
+                condition=models.Q(deleted_at__isnull=True),
+                name="task_live_to_priority_idx",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="task_deleted_at_idx",
+            ),
+            # the ready queue of a user
+            models.Index(
+                fields=["assigned_to", "-priority", "due_date"],
+                condition=models.Q(
+                    complete=False, blocked_by_count=0, deleted_at__isnull=True
+                ),
+                name="task_ready_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remembered so the previous assignee can be told about a reassignment
+        instance._loaded_assigned_to_id = instance.__dict__.get("assigned_to_id")
+        # and so reminders go out again when the due date moves or it reopens
+        instance._loaded_due_date = instance.__dict__.get("due_date")
+        instance._loaded_complete = instance.__dict__.get("complete")
+        return instance
+
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["deleted_at", "modified"])
+
+    def restore(self):
+        self.deleted_at = None
+        # a restored task counts as changed, see taskapp.reminders
+        self.save(update_fields=["deleted_at", "modified"])
+
+    @property
+    def blocked(self):
+        return self.blocked_by_count > 0
+
+
+class TaskDependency(models.Model):
+    """
+    An edge of the task dependency graph, task can only be worked on once
+    depends_on is complete. Edges are added through taskapp.dependencies,
+    which rejects cycles """
+
+    task = models.ForeignKey(
+        Task, on_delete=models.CASCADE, related_name="dependencies"
+    )
+    depends_on = models.ForeignKey(
+        Task, on_delete=models.CASCADE, related_name="dependents"
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "depends_on"], name="unique_task_dependency"
+            ),
+            models.CheckConstraint(
+                check=~models.Q(task=models.F("depends_on")),
+                name="task_dependency_not_self",
+            ),
+        ]
+        # the reverse direction, for the dependents of a task
+        indexes = [models.Index(fields=["depends_on", "task"])]
+
+    def __str__(self):
+        return f"{self.task} depends on {self.depends_on}"
+
 
 class Comment(TimeStampedModel):
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
     content = models.TextField()
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
-    commented_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    commented_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created"]),
+            models.Index(fields=["workspace", "task"]),
+        ]
 
     def __str__(self):
         return self.content
+
+
+class Attachment(TimeStampedModel):
+    """
+    A file uploaded to a task or to one of its comments. The content is
+    stored once per workspace and SHA-256 hash, see taskapp.attachments.
+    Deleting or archiving the task or comment leaves the row alone, archived
+    tasks keep their ids and so keep their attachments """
+
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.DO_NOTHING,
+        related_name="attachments",
+        db_constraint=False,
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        related_name="attachments",
+        db_constraint=False,
+    )
+    uploaded_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False
+    )
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        # finds the other attachments sharing a stored file
+        indexes = [models.Index(fields=["workspace", "sha256"])]
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedTask(models.Model):
+    """
+    A completed task moved out of the Task table by the archive_tasks
+    command. It keeps the id of the original task so links stay valid """
+
+    id = models.BigIntegerField(primary_key=True)
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+    title = models.CharField(max_length=50)
+    description = models.TextField(max_length=100)
+    due_date = models.DateField()
+    assigned_to = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="archived_assigned_task",
+    )
+    assigned_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_task"
+    )
+    complete = models.BooleanField(default=True)
+    assigned_at = models.DateField()
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+    content = models.TextField()
+    task = models.ForeignKey(
+        ArchivedTask, on_delete=models.CASCADE, related_name="comments"
+    )
+    commented_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_comments"
+    )
+
+    def __str__(self):
+        return self.content
+
+
+EVENT_ACTION_CHOICES = [
+    ("created", "Created"),
+    ("updated", "Updated"),
+    ("deleted", "Deleted"),
+    ("archived", "Archived"),
+    # the task was reassigned, the previous assignee no longer sees it
+    ("revoked", "Revoked"),
+]
+
+
+class TaskEvent(models.Model):
+    """
+    An append-only record of a change to a task or a comment. The id is a
+    monotonic sequence number that clients use as their sync token """
+
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=20, choices=EVENT_ACTION_CHOICES)
+    # the users allowed to see the event, copied from the task
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    assigned_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["assigned_to", "id"]),
+            models.Index(fields=["assigned_by", "id"]),
+            models.Index(fields=["model", "object_id", "id"]),
+            # read by the webhook worker after its cursor
+            models.Index(fields=["workspace", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.action}"
+
+
+def new_webhook_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(TimeStampedModel):
+    """
+    A URL that receives the task events of a workspace. The deliver_webhooks
+    worker posts them in batches and moves last_event_id past every batch the
+    endpoint accepted, failed batches are retried with exponential backoff.
+    Endpoints failing for too long are deactivated """
+
+    workspace = models.ForeignKey(
+        Workspace, on_delete=models.CASCADE, null=True, blank=True
+    )
+    url = models.URLField(max_length=500)
+    # signs every request, see taskapp.webhooks.sign
+    secret = models.CharField(max_length=64, default=new_webhook_secret)
+    # "<model>.<action>" like "task.updated", empty for every event
+    event_types = models.JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True)
+    last_event_id = models.BigIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    # start of the current run of failures, see WEBHOOK_DEACTIVATE_SECONDS
+    failing_since = models.DateTimeField(null=True, blank=True)
+    # not before then, the worker also sets it to claim the endpoint
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["is_active", "next_attempt_at"])]
+
+    def __str__(self):
+        return self.url
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.last_event_id:
+            # a new endpoint gets the events from now on, not the history
+            last = TaskEvent.objects.aggregate(last=models.Max("id"))["last"]
+            self.last_event_id = last or 0
+        super().save(*args, **kwargs)
+
+
+def unique_per_workspace(*fields, name):
+    """
+    Unique constraints on fields within a workspace. NULLs never clash in a
+    unique constraint, so the default workspace gets a partial one of its own """
+    return [
+        models.UniqueConstraint(
+            fields=["workspace", *fields],
+            condition=models.Q(workspace__isnull=False),
+            name=name,
+        ),
+        models.UniqueConstraint(
+            fields=fields,
+            condition=models.Q(workspace__isnull=True),
+            name=f"{name}_default",
+        ),
+    ]
+
+
+class DailyTaskStats(models.Model):
+    """
+    Number of tasks of a workspace created and completed on a day, kept up to
+    date by taskapp.stats so the dashboard never aggregates the Task table """
+
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    day = models.DateField()
+    created_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = unique_per_workspace("day", name="unique_daily_task_stats")
+
+    def __str__(self):
+        return str(self.day)
+
+
+class DueDateStats(models.Model):
+    """
+    Number of open tasks of a workspace due on a day, used to count overdue
+    tasks """
+
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    due_date = models.DateField()
+    open_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = unique_per_workspace("due_date", name="unique_due_date_stats")
+
+    def __str__(self):
+        return str(self.due_date)
+
+
+class UserTaskStats(models.Model):
+    """
+    Workload of a single assignee within a workspace """
+
+    workspace = models.ForeignKey(
+        Workspace,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_stats")
+    open_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = unique_per_workspace("user", name="unique_user_task_stats")
+        indexes = [models.Index(fields=["workspace", "-open_count"])]
+
+    def __str__(self):
+        return str(self.user)
+
+
+REMINDER_KIND_CHOICES = [("due_soon", "Due soon"), ("overdue", "Overdue")]
+
+
+class TaskReadMarker(models.Model):
+    """
+    When user last read the comments of task. Comments created after read_at
+    are unread """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="read_markers",
+        db_constraint=False,
+    )
+    task = models.ForeignKey(
+        Task, on_delete=models.CASCADE, related_name="read_markers"
+    )
+    read_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "task"], name="unique_task_read_marker"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} read {self.task}"
+
+
+class TaskReminder(models.Model):
+    """
+    A reminder that was sent for a task, it makes sure every kind of reminder
+    goes out only once per task """
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="reminders")
+    kind = models.CharField(max_length=20, choices=REMINDER_KIND_CHOICES)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "kind"], name="unique_task_reminder"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.task} {self.kind}"
+
+
+class ReminderCursor(models.Model):
+    """
+    High-water mark of the reminder scheduler for one kind of reminder. Due
+    dates up to last_due_date were scanned, and so were the tasks changed
+    before last_modified """
+
+    kind = models.CharField(max_length=20, choices=REMINDER_KIND_CHOICES, unique=True)
+    last_due_date = models.DateField()
+    last_modified = models.DateTimeField()
+
+    def __str__(self):
+        return self.kind
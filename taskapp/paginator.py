@@ -0,0 +1,111 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that reads the row count of an unfiltered PostgreSQL table
+    from the planner statistics instead of running COUNT(*) over it. Small
+    tables, filtered querysets and other databases get the exact count """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > self.estimate_threshold:
+                return int(row[0])
+        return super().count
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    A paginator that continues after the sort key of the last row of the
+    previous page instead of using OFFSET, so every page is a range scan on an
+    index matching the ordering. The primary key is always the final sort key
+    to make the order total. Ordered fields must not be nullable """
+
+    def __init__(self, queryset, ordering, per_page, load=list):
+        self.queryset = queryset
+        self.ordering = [*ordering, "pk"]
+        self.per_page = per_page
+        # turns the sliced queryset into the objects of a page, they need
+        # attributes for the ordered fields
+        self.load = load
+
+    def fields(self):
+        return [name.lstrip("-") for name in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name) for name in self.fields()]
+        data = json.dumps(values, cls=DjangoJSONEncoder).encode()
+        return urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            opts = self.queryset.model._meta
+            fields = [
+                opts.pk if name == "pk" else opts.get_field(name)
+                for name in self.fields()
+            ]
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise ValueError("Invalid cursor")
+
+    def after(self, values):
+        # (a, b, pk) > (x, y, z) spelled out so each key can have its own direction
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{field}__{lookup}": value})
+            equal[field] = value
+        return condition
+
+    def page(self, cursor=None):
+        """
+        Returns the page after cursor, the first page without one. An invalid
+        cursor raises ValueError """
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        object_list = self.load(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[: self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+        return KeysetPage(object_list, next_cursor)
@@ -0,0 +1,126 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """
+    Turns "10/m" into (requests, seconds) """
+    count, period = rate.split("/")
+    return int(count), PERIODS[period]
+
+
+def increment(key, timeout):
+    # the first request of a window creates the counter, the rest increment it
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # expired between the two calls
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def count_request(key, rate):
+    """
+    Counts a request in a sliding window: the count of the current fixed
+    window plus the count of the previous one, weighted by how much of it the
+    sliding window still covers. So a burst at the end of one window and
+    another at the start of the next cannot pass twice the limit. cache.add and
+    cache.incr are atomic, so concurrent requests each get their own count and
+    never all pass on the same one. Returns 0 when the request is within the
+    limit, otherwise the number of seconds to wait """
+    limit, seconds = parse_rate(rate)
+    now = time.time()
+    window = int(now // seconds)
+    # kept through the next window, which weighs it, and a second to spare
+    count = increment(f"{key}:{window}", 2 * seconds + 1)
+    previous = cache.get(f"{key}:{window - 1}", 0)
+    elapsed = now - window * seconds
+    estimate = previous * (seconds - elapsed) / seconds + count
+    if estimate <= limit:
+        return 0
+    if count > limit:
+        return (window + 1) * seconds - now
+    # the share of the previous window shrinks as the sliding window moves on
+    return (estimate - limit) * seconds / previous
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def check_rate_limits(request, scope, username=None):
+    """
+    Applies the per ip, per user and per username limits configured for scope
+    in settings.RATE_LIMITS. username is the account a login tries, which
+    catches guessing one account's password from many addresses. Returns the
+    seconds to wait, 0 if allowed """
+    limits = getattr(settings, "RATE_LIMITS", {}).get(scope, {})
+    idents = {"ip": client_ip(request)}
+    if request.user.is_authenticated:
+        idents["user"] = request.user.pk
+    if username:
+        # hashed, cache keys must not hold arbitrary user input
+        normalized = username.strip().lower().encode()
+        idents["username"] = hashlib.sha256(normalized).hexdigest()
+    wait = 0
+    for kind, rate in limits.items():
+        if kind in idents:
+            key = f"ratelimit:{scope}:{kind}:{idents[kind]}"
+            wait = max(wait, count_request(key, rate))
+    return wait
+
+
+def too_many_requests(wait):
+    response = HttpResponse("Too many requests, try again later.", status=429)
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+def rate_limit(scope, methods=("POST",), username_field=None):
+    """
+    Decorator for function views, see RateLimitMixin """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                username = request.POST.get(username_field) if username_field else None
+                wait = check_rate_limits(request, scope, username)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
+
+
+class RateLimitMixin:
+    """
+    Rejects requests over the limits configured for rate_limit_scope in
+    settings.RATE_LIMITS with a 429 response and a Retry-After header. The
+    POST field named by rate_limit_username_field is limited as "username" """
+
+    rate_limit_scope = None
+    rate_limit_methods = ("POST",)
+    rate_limit_username_field = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limit_methods:
+            username = None
+            if self.rate_limit_username_field:
+                username = request.POST.get(self.rate_limit_username_field)
+            wait = check_rate_limits(request, self.rate_limit_scope, username)
+            if wait:
+                return too_many_requests(wait)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ReminderCursor, Task, TaskReminder
+from .utils import reminder_email
+
+
+def reminder_window(kind, today, lead_days, lookback_days):
+    if kind == "overdue":
+        return today - timedelta(days=lookback_days), today - timedelta(days=1)
+    return today, today + timedelta(days=lead_days)
+
+
+# a task saved just before a run may commit after it, so every run looks a
+# little further back than the previous one got; reminders already sent are
+# left out by the join either way
+CURSOR_OVERLAP = timedelta(minutes=5)
+
+
+def pending_tasks(kind, start, end, cursor):
+    tasks = Task.objects.filter(
+        complete=False,
+        assigned_to__isnull=False,
+        due_date__gte=start,
+        due_date__lte=end,
+    )
+    if cursor is not None:
+        # due dates behind the high-water mark were scanned by an earlier run,
+        # tasks in them can only be new by a change since: created, moved
+        # there, reopened or restored. taskapp.signals.reset_reminders deleted
+        # the reminders of the moved and reopened ones
+        unscanned = Q(due_date__gt=cursor.last_due_date)
+        changed = Q(modified__gte=cursor.last_modified - CURSOR_OVERLAP)
+        tasks = tasks.filter(unscanned | changed)
+    return (
+        tasks.exclude(reminders__kind=kind)
+        .select_related("assigned_to")
+        .order_by("id")
+    )
+
+
+def send_batch(kind, tasks, connection):
+    # the unique (task, kind) constraint makes a concurrent run fail here
+    # instead of sending the same reminder twice
+    with transaction.atomic(using=router.db_for_write(TaskReminder)):
+        TaskReminder.objects.bulk_create(
+            TaskReminder(task=task, kind=kind) for task in tasks
+        )
+        connection.send_messages(
+            [reminder_email(task, kind, connection) for task in tasks]
+        )
+
+
+def send_reminders(kind, lead_days=1, lookback_days=7, batch_size=100):
+    """
+    Sends the reminders of one kind ("due_soon" or "overdue") that were not
+    sent yet and moves the high-water mark forward. Returns the number sent """
+    started = timezone.now()
+    start, end = reminder_window(
+        kind, timezone.localdate(), lead_days, lookback_days
+    )
+    cursor = ReminderCursor.objects.filter(kind=kind).first()
+    tasks = pending_tasks(kind, start, end, cursor)
+
+    sent = 0
+    connection = get_connection()
+    with connection:
+        after_id = 0
+        while True:
+            batch = list(tasks.filter(id__gt=after_id)[:batch_size])
+            if not batch:
+                break
+            send_batch(kind, batch, connection)
+            sent += len(batch)
+            after_id = batch[-1].id
+
+    ReminderCursor.objects.update_or_create(
+        kind=kind, defaults={"last_due_date": end, "last_modified": started}
+    )
+    return sent
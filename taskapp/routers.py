@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_active_workspace = ContextVar("active_workspace", default=None)
+
+
+def get_active_workspace():
+    return _active_workspace.get()
+
+
+def set_active_workspace(workspace):
+    return _active_workspace.set(workspace)
+
+
+def reset_active_workspace(token):
+    _active_workspace.reset(token)
+
+
+@contextmanager
+def active_workspace(workspace):
+    token = set_active_workspace(workspace)
+    try:
+        yield workspace
+    finally:
+        reset_active_workspace(token)
+
+
+def workspace_databases():
+    """
+    Makes each database alias that holds workspace rows the active one in
+    turn and yields it. Jobs over every task, like the management commands,
+    have no request to pick the database and run once per alias instead """
+    Workspace = apps.get_model("taskapp", "Workspace")
+    aliases = set(Workspace.objects.values_list("db_alias", flat=True).distinct())
+    for alias in sorted(aliases | {DEFAULT_DB_ALIAS}):
+        # the router only reads db_alias off the active workspace
+        with active_workspace(Workspace(db_alias=alias)):
+            yield alias
+
+
+def reserve_id_range(using, **kwargs):
+    """
+    A post_migrate receiver that starts the ids of the workspace tables on a
+    database at the ID_OFFSET of its DATABASES entry. Task ids show up in
+    URLs, the event log and the archive, which all live on default, so they
+    have to be unique across databases """
+    connection = connections[using]
+    offset = connection.settings_dict.get("ID_OFFSET")
+    if not offset:
+        return
+    tables = [
+        model._meta.db_table
+        for model in apps.get_app_config("taskapp").get_models()
+        if WorkspaceRouter().is_tenant_model(model)
+    ]
+    with connection.cursor() as cursor:
+        for table in tables:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM "
+                    f"{connection.ops.quote_name(table)})))",
+                    [table, offset],
+                )
+            elif connection.vendor == "sqlite":
+                cursor.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s",
+                    [offset, table],
+                )
+                if not cursor.rowcount:
+                    cursor.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)",
+                        [table, offset],
+                    )
+            else:
+                raise ImproperlyConfigured(
+                    f"ID_OFFSET is not supported on {connection.vendor} databases"
+                )
+
+
+class WorkspaceRouter:
+    """
+    A database router that stores the tasks and comments of a workspace on the
+    database alias configured on the workspace. Users and workspaces always
+    live on the default database. The workspace is taken from the request
+    (see WorkspaceMiddleware) or from the instance being saved """
+
+    tenant_models = {
+        "task",
+        "comment",
+        "taskreminder",
+        "remindercursor",
+        "taskdependency",
+        "taskreadmarker",
+        "attachment",
+    }
+
+    def is_tenant_model(self, model):
+        # works for model classes and instances alike
+        if model._meta.app_label != "taskapp":
+            return False
+        return model._meta.model_name in self.tenant_models
+
+    def db_for_model(self, model, **hints):
+        if not self.is_tenant_model(model):
+            # also when the lookup starts from a task on another database
+            return DEFAULT_DB_ALIAS
+        workspace = get_active_workspace()
+        if workspace is not None:
+            return workspace.db_alias
+        instance = hints.get("instance")
+        if getattr(instance, "workspace_id", None) is not None:
+            return instance.workspace.db_alias
+        # let Django fall back to the database the instance came from
+        return None
+
+    db_for_read = db_for_model
+    db_for_write = db_for_model
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # tasks reference users and workspaces across databases by id only
+        if self.is_tenant_model(obj1) != self.is_tenant_model(obj2):
+            return True
+        return None
@@ -0,0 +1,68 @@
+from .models import PRIORITY_CHOICES, User
+
+# the columns the task list templates show, sort on or link with
+TASK_ROW_FIELDS = (
+    "id",
+    "title",
+    "due_date",
+    "status",
+    "priority",
+    "complete",
+    "assigned_at",
+    "assigned_to_id",
+    "assigned_by_id",
+)
+PRIORITY_LABELS = dict(PRIORITY_CHOICES)
+
+
+class TaskRow:
+    """
+    A read-only task for the list pages. It holds the listed columns only,
+    with the users as their display names, and has no __dict__ """
+
+    __slots__ = (*TASK_ROW_FIELDS, "assigned_to", "assigned_by", "unread_comments")
+
+    def __init__(self, values):
+        for name, value in zip(TASK_ROW_FIELDS, values):
+            setattr(self, name, value)
+        self.assigned_to = self.assigned_by = None
+        self.unread_comments = 0
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f"<TaskRow {self.id}: {self.title}>"
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_priority_display(self):
+        return PRIORITY_LABELS.get(self.priority, self.priority)
+
+
+def user_names(user_ids):
+    """
+    Maps user ids to the text the templates show for a user """
+    # str(User) is the email, reading just that column builds no User objects
+    return dict(
+        User.objects.filter(id__in=user_ids).values_list("id", "email").iterator()
+    )
+
+
+def task_rows(queryset):
+    """
+    Evaluates a Task or ArchivedTask queryset into TaskRow objects. The users
+    are looked up with one more query instead of a join because tasks may live
+    on another database than users """
+    rows = [TaskRow(values) for values in queryset.values_list(*TASK_ROW_FIELDS)]
+    if not rows:
+        return rows
+    names = user_names(
+        {row.assigned_to_id for row in rows} | {row.assigned_by_id for row in rows}
+    )
+    for row in rows:
+        row.assigned_to = names.get(row.assigned_to_id)
+        row.assigned_by = names.get(row.assigned_by_id)
+    return rows
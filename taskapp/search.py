@@ -0,0 +1,147 @@
+import hashlib
+import secrets
+import time
+from bisect import bisect_left
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import STATUS_CHOICES, ArchivedTask, Task, User
+from .rows import task_rows
+from .utils import search_tasks
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# workspace id -> (built at, sorted list of (term, suggestion)), per process
+_suggestion_index = {}
+
+
+def normalize_keyword(keyword):
+    """
+    Searches are case insensitive, so differently typed keywords share one
+    cache entry """
+    return " ".join(keyword.split()).casefold()
+
+
+def generation_key(workspace_id):
+    return f"search:generation:{workspace_id}"
+
+
+def search_generation(workspace_id):
+    """
+    Part of every cached search of a workspace, replaced whenever one of its
+    tasks changes so the cached results are no longer found """
+    key = generation_key(workspace_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = secrets.token_hex(8)
+        if not cache.add(key, generation, CACHE_TIMEOUT):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def invalidate_searches(workspace_ids):
+    cache.set_many(
+        {
+            generation_key(workspace_id): secrets.token_hex(8)
+            for workspace_id in workspace_ids
+        },
+        CACHE_TIMEOUT,
+    )
+
+
+def result_key(workspace_id, keyword):
+    generation = search_generation(workspace_id)
+    digest = hashlib.sha256(keyword.encode()).hexdigest()[:32]
+    return f"search:result:{workspace_id}:{generation}:{digest}"
+
+
+def cached_search(workspace, keyword):
+    """
+    The tasks and archived tasks of workspace matching keyword. Only the ids
+    are cached, for SEARCH_CACHE_SECONDS or until a task of the workspace
+    changes, the TaskRow projections are then loaded by primary key """
+    keyword = normalize_keyword(keyword)
+    workspace_id = workspace.pk if workspace else None
+    key = result_key(workspace_id, keyword)
+    ids = cache.get(key)
+    if ids is None:
+        ids = {
+            "tasks": list(
+                search_tasks(
+                    Task.objects.filter(workspace=workspace), keyword
+                ).values_list("id", flat=True)
+            ),
+            # archived tasks are searched too so they stay reachable
+            "archived": list(
+                search_tasks(
+                    ArchivedTask.objects.filter(workspace=workspace), keyword
+                ).values_list("id", flat=True)
+            ),
+        }
+        cache.set(key, ids, getattr(settings, "SEARCH_CACHE_SECONDS", 60))
+    tasks = load_in_order(Task.objects.filter(workspace=workspace), ids["tasks"])
+    archived = load_in_order(
+        ArchivedTask.objects.filter(workspace=workspace), ids["archived"]
+    )
+    return tasks + archived
+
+
+def load_in_order(queryset, ids):
+    if not ids:
+        return []
+    rows = {row.id: row for row in task_rows(queryset.filter(id__in=ids))}
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def build_suggestion_index(workspace):
+    """
+    Sorted (term, suggestion) pairs of the statuses and the first names of the
+    users who assigned tasks in workspace """
+    entries = {}
+    for value, label in STATUS_CHOICES:
+        entries[normalize_keyword(value)] = value
+        entries[normalize_keyword(label)] = value
+    # tasks may live on another database than users, so no join
+    assigner_ids = list(
+        Task.objects.filter(workspace=workspace)
+        .order_by()
+        .values_list("assigned_by_id", flat=True)
+        .distinct()
+    )
+    for first_name in (
+        User.objects.filter(id__in=assigner_ids)
+        .exclude(first_name="")
+        .values_list("first_name", flat=True)
+    ):
+        entries[normalize_keyword(first_name)] = first_name
+    return sorted(entries.items())
+
+
+def suggestion_index(workspace):
+    workspace_id = workspace.pk if workspace else None
+    built_at, index = _suggestion_index.get(workspace_id, (0, None))
+    max_age = getattr(settings, "SEARCH_SUGGESTION_SECONDS", 300)
+    if index is None or time.monotonic() - built_at > max_age:
+        index = build_suggestion_index(workspace)
+        _suggestion_index[workspace_id] = (time.monotonic(), index)
+    return index
+
+
+def suggest(workspace, prefix, limit=10):
+    """
+    Statuses and assigner names starting with prefix, found by binary search
+    in the prefix index of the workspace """
+    prefix = normalize_keyword(prefix)
+    if not prefix:
+        return []
+    index = suggestion_index(workspace)
+    suggestions = []
+    position = bisect_left(index, (prefix,))
+    for term, suggestion in islice(index, position, None):
+        if not term.startswith(prefix) or len(suggestions) == limit:
+            break
+        if suggestion not in suggestions:
+            suggestions.append(suggestion)
+    return suggestions
@@ -0,0 +1,186 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from itertools import takewhile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .ical import invalidate_calendars
+from .models import PRIORITY_NAMES, Comment, Task, TaskEvent, TaskReminder
+from .search import invalidate_searches
+
+TASK_EVENT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "due_date",
+    "assigned_to",
+    "assigned_by",
+    "priority",
+    "status",
+    "complete",
+]
+COMMENT_EVENT_FIELDS = ["id", "task", "content", "commented_by"]
+
+# set while archived tasks are removed from the task table
+_archiving = ContextVar("archiving", default=False)
+
+
+def build_event(instance, task, action, fields):
+    if action in ("deleted", "archived"):
+        payload = {"id": instance.id}
+    else:
+        payload = model_to_dict(instance, fields=fields)
+        # clients predate priority ranks and keep getting the names
+        if "priority" in payload:
+            payload["priority"] = PRIORITY_NAMES.get(payload["priority"])
+    return TaskEvent(
+        workspace_id=task.workspace_id,
+        model=instance._meta.model_name,
+        object_id=instance.id,
+        action=action,
+        assigned_to_id=task.assigned_to_id,
+        assigned_by_id=task.assigned_by_id,
+        payload=payload,
+    )
+
+
+def record_event(instance, task, action, fields):
+    build_event(instance, task, action, fields).save()
+
+
+def task_events(task, action):
+    """
+    The events of a task change. When the change took the task away from its
+    assignee, that user no longer sees the task's events and gets a "revoked"
+    event instead, so their synced copy of the task is dropped """
+    events = [build_event(task, task, action, TASK_EVENT_FIELDS)]
+    previous = getattr(task, "_loaded_assigned_to_id", None)
+    if previous is not None and previous not in (
+        task.assigned_to_id,
+        task.assigned_by_id,
+    ):
+        events.append(
+            TaskEvent(
+                workspace_id=task.workspace_id,
+                model=task._meta.model_name,
+                object_id=task.id,
+                action="revoked",
+                assigned_to_id=previous,
+                payload={"id": task.id},
+            )
+        )
+    return events
+
+
+def settled(events):
+    """
+    The leading events of events, which are in id order, recorded at least
+    TASK_EVENT_SETTLE_SECONDS ago. Ids are handed out on insert but show up on
+    commit, so an event with a lower id can still appear next to a fresh one.
+    A cursor moved past it would skip that event for good """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_EVENT_SETTLE_SECONDS)
+    return list(takewhile(lambda event: event.created <= cutoff, events))
+
+
+def invalidate_task_caches(tasks):
+    """
+    Expires the calendar feeds and search results that may show tasks """
+    user_ids = set()
+    workspace_ids = set()
+    for task in tasks:
+        user_ids |= {
+            task.assigned_to_id,
+            task.assigned_by_id,
+            getattr(task, "_loaded_assigned_to_id", None),
+        }
+        task._loaded_assigned_to_id = task.assigned_to_id
+        workspace_ids.add(task.workspace_id)
+
+    # after the commit, so a cache rebuilt right away sees the change
+    def invalidate():
+        invalidate_calendars(user_ids)
+        invalidate_searches(workspace_ids)
+
+    transaction.on_commit(invalidate, using=tasks[0]._state.db)
+
+
+def reset_reminders(tasks):
+    """
+    Forgets the reminders sent for tasks whose due date moved or that were
+    reopened, so the reminder scheduler picks them up again """
+    reset = []
+    for task in tasks:
+        due_date = getattr(task, "_loaded_due_date", None)
+        complete = getattr(task, "_loaded_complete", None)
+        if (due_date is not None and due_date != task.due_date) or (
+            complete and not task.complete
+        ):
+            reset.append(task.id)
+        task._loaded_due_date = task.due_date
+        task._loaded_complete = task.complete
+    if reset:
+        TaskReminder.objects.using(tasks[0]._state.db).filter(
+            task_id__in=reset
+        ).delete()
+
+
+def record_task_updates(tasks):
+    """
+    Task events for tasks changed with bulk_update, which sends no signals """
+    TaskEvent.objects.bulk_create(
+        event for task in tasks for event in task_events(task, "updated")
+    )
+    reset_reminders(tasks)
+    invalidate_task_caches(tasks)
+
+
+@contextmanager
+def archiving(tasks):
+    """
+    Records an "archived" event for each of tasks. Deleting the tasks inside
+    the block records no "deleted" events, the tasks live on in the archive """
+    TaskEvent.objects.bulk_create(
+        build_event(task, task, "archived", TASK_EVENT_FIELDS) for task in tasks
+    )
+    invalidate_task_caches(tasks)
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    if created:
+        action = "created"
+    elif instance.deleted_at is not None:
+        action = "deleted"
+    else:
+        action = "updated"
+    TaskEvent.objects.bulk_create(task_events(instance, action))
+    reset_reminders([instance])
+    invalidate_task_caches([instance])
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    # soft deleted tasks already produced their delete event
+    if instance.deleted_at is None and not _archiving.get():
+        record_event(instance, instance, "deleted", TASK_EVENT_FIELDS)
+        invalidate_task_caches([instance])
+
+
+# Comments are only ever removed together with their task, whose delete event
+# covers them. Not listening to Comment deletes keeps those bulk deletes on
+# Django's fast path.
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    action = "created" if created else "updated"
+    record_event(instance, instance.task, action, COMMENT_EVENT_FIELDS)
@@ -0,0 +1,103 @@
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyTaskStats, DueDateStats, UserTaskStats
+
+TaskSnapshot = namedtuple(
+    "TaskSnapshot", ["assigned_to_id", "due_date", "complete", "workspace_id"]
+)
+
+
+def snapshot(task):
+    """
+    The parts of a task the statistics depend on, None for a deleted task """
+    if task is None or task.deleted_at is not None:
+        return None
+    return TaskSnapshot(
+        task.assigned_to_id, task.due_date, task.complete, task.workspace_id
+    )
+
+
+def increment(model, lookup, **deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # another request created the row in the meantime
+        model.objects.filter(**lookup).update(**changes)
+
+
+def contribution(state):
+    user_counts = Counter()
+    due_counts = Counter()
+    if state is not None:
+        workspace_id = state.workspace_id
+        if state.complete:
+            user_counts[(workspace_id, state.assigned_to_id, "completed_count")] += 1
+        else:
+            user_counts[(workspace_id, state.assigned_to_id, "open_count")] += 1
+            due_counts[(workspace_id, state.due_date)] += 1
+    return user_counts, due_counts
+
+
+def record_task_change(before, after, created=False):
+    """
+    Updates the aggregate tables for a task that went from the `before` to
+    the `after` snapshot. Either of them is None for new, deleted or restored
+    tasks """
+    record_task_changes([(before, after)], created=int(created))
+
+
+def record_task_changes(changes, created=0):
+    """
+    record_task_change for a list of (before, after) snapshot pairs, every
+    aggregate row is updated once however many tasks touch it. created is
+    the number of new tasks among them, the first pairs without a before
+    snapshot """
+    users = Counter()
+    due = Counter()
+    daily = defaultdict(Counter)
+    for before, after in changes:
+        old_users, old_due = contribution(before)
+        new_users, new_due = contribution(after)
+        users.update(new_users)
+        users.subtract(old_users)
+        due.update(new_due)
+        due.subtract(old_due)
+        if before is None and after is not None and created:
+            daily[after.workspace_id]["created_count"] += 1
+            created -= 1
+        if before is not None and after is not None:
+            # only status transitions count, deleting a task keeps its history
+            daily[after.workspace_id]["completed_count"] += int(
+                after.complete
+            ) - int(before.complete)
+
+    user_deltas = defaultdict(dict)
+    for (workspace_id, user_id, field), delta in users.items():
+        if user_id is not None:
+            user_deltas[(workspace_id, user_id)][field] = delta
+    for (workspace_id, user_id), deltas in user_deltas.items():
+        increment(
+            UserTaskStats, {"workspace_id": workspace_id, "user_id": user_id}, **deltas
+        )
+    for (workspace_id, due_date), delta in due.items():
+        increment(
+            DueDateStats,
+            {"workspace_id": workspace_id, "due_date": due_date},
+            open_count=delta,
+        )
+    today = timezone.localdate()
+    for workspace_id, deltas in daily.items():
+        increment(
+            DailyTaskStats, {"workspace_id": workspace_id, "day": today}, **deltas
+        )
@@ -1,7 +1,92 @@
-from django.test import Client, TestCase
-from django.urls import reverse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib.util import find_spec
+from io import StringIO
+from unittest import mock, skipUnless
 
-from .models import Comment, Task, User
+import brotli
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from . import search
+from .attachments import delete_blob, parse_range
+from .dependencies import add_dependency
+from .lazy import LazyView
+from .loadtest import (
+    VirtualUser,
+    drive,
+    parse_mix,
+    percentile,
+    plan_users,
+    seed,
+    start_server,
+)
+from .management.commands.benchmark_task_rows import load_models
+from .management.commands.benchmark_task_rows import measure as measure_task_rows
+from .management.commands.profile_startup import measure_startup
+from .middleware import CompressionMiddleware, HTMLMinifyMiddleware, minify_html
+from .models import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_MEDIUM,
+    ArchivedTask,
+    Attachment,
+    Comment,
+    DailyTaskStats,
+    DueDateStats,
+    ReminderCursor,
+    Task,
+    TaskDependency,
+    TaskEvent,
+    TaskReminder,
+    User,
+    UserTaskStats,
+    WebhookEndpoint,
+    Workspace,
+)
+from .paginator import EstimatedCountPaginator, KeysetPaginator
+from .ratelimit import count_request
+from .routers import (
+    WorkspaceRouter,
+    active_workspace,
+    reset_active_workspace,
+    set_active_workspace,
+)
+from .rows import TaskRow, task_rows
+from .unread import unread_counts
+from .views import AttachmentUploadView, TaskListMixin
+from .warmup import warm_up
+from .webhooks import ConnectionPool, backoff, claim, deliver_due, post_batch, sign
 
 
 class TestCreateTask(TestCase):
@@ -283,3 +368,1903 @@ class TestAllTaskView(TestCase):
 
         response = self.client.get(self.url)
         self.assertRedirects(response, reverse("login") + "?next=" + self.url)
+
+
+class TestStaticAssets(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+
+    def test_pages_do_not_use_external_assets(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        response = self.client.get(reverse("home"))
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+        self.assertNotContains(response, "mdbcdn.b-cdn.net")
+        self.assertNotContains(response, "cdnjs.cloudflare.com")
+
+    def test_collectstatic_builds_hashed_compressed_files(self):
+        with tempfile.TemporaryDirectory() as static_root:
+            storages = {
+                **settings.STORAGES,
+                "staticfiles": {
+                    "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
+                },
+            }
+            with self.settings(STATIC_ROOT=static_root, STORAGES=storages):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                hashed = staticfiles_storage.stored_name("static/style.css")
+                self.assertNotEqual(hashed, "static/style.css")
+                path = os.path.join(static_root, hashed)
+                self.assertTrue(os.path.exists(path))
+                self.assertTrue(os.path.exists(path + ".gz"))
+
+
+class TestCompressionMiddleware(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.html = "<div>\n    <span>task</span>\n</div>\n" * 100
+
+    def test_minify_html_keeps_preformatted_blocks(self):
+        html = "<p>\n   a   b\n</p>\n<textarea>  keep\n  me</textarea>"
+        self.assertEqual(
+            minify_html(html), "<p> a b </p> <textarea>  keep\n  me</textarea>"
+        )
+
+    def test_html_is_minified(self):
+        middleware = HTMLMinifyMiddleware(lambda request: HttpResponse(self.html))
+        response = middleware(self.factory.get("/"))
+        self.assertNotIn(b"\n", response.content)
+
+    def test_gzip_and_brotli_selected_from_accept_encoding(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(self.html))
+        response = middleware(self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content).decode(), self.html)
+        response = middleware(self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip, br"))
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content).decode(), self.html)
+
+    def test_small_responses_are_not_compressed(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse("ok"))
+        response = middleware(self.factory.get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streaming_response_is_compressed(self):
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter([self.html] * 3))
+        )
+        response = middleware(self.factory.get("/", HTTP_ACCEPT_ENCODING="br"))
+        self.assertEqual(response["Content-Encoding"], "br")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(brotli.decompress(content).decode(), self.html * 3)
+
+
+class TestTaskAdmin(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.admin = User.objects.create_superuser(
+            email="admin@gmail.com", password="12345"
+        )
+        self.client.login(email="admin@gmail.com", password="12345")
+        self.url = reverse("admin:taskapp_task_changelist")
+
+    def create_tasks(self, count):
+        for i in range(count):
+            assignee = User.objects.create_user(
+                email=f"assignee{Task.objects.count()}@gmail.com", password="1234"
+            )
+            Task.objects.create(
+                title=f"task {i}",
+                description="admin task",
+                assigned_to=assignee,
+                assigned_by=self.admin,
+                due_date="2024-12-24",
+            )
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.create_tasks(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        self.create_tasks(10)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(few), len(many))
+
+    def test_changelist_can_use_the_estimated_count(self):
+        self.create_tasks(2)
+        Task.objects.first().soft_delete()
+        response = self.client.get(self.url)
+        paginator = response.context["cl"].paginator
+        self.assertIsInstance(paginator, EstimatedCountPaginator)
+        # the soft delete filter would make the paginator count exactly
+        self.assertFalse(paginator.object_list.query.where)
+        self.assertEqual(paginator.count, 2)
+        response = self.client.get(self.url, {"deleted": "no"})
+        self.assertEqual(response.context["cl"].paginator.count, 1)
+
+    def test_paginator_counts_exactly_on_sqlite(self):
+        self.create_tasks(3)
+        paginator = EstimatedCountPaginator(Task.objects.order_by("id"), 2)
+        self.assertEqual(paginator.count, 3)
+
+
+class TestArchiveTasks(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345", first_name="test user"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        self.old_task = Task.objects.create(
+            title="old task",
+            description="this is an old task",
+            assigned_to=self.user2,
+            assigned_by=self.user,
+            due_date="2024-01-24",
+            complete=True,
+            status="completed",
+        )
+        Comment.objects.create(
+            content="old comment", task=self.old_task, commented_by=self.user2
+        )
+        self.open_task = Task.objects.create(
+            title="open task",
+            description="this is an open task",
+            assigned_to=self.user2,
+            assigned_by=self.user,
+            due_date="2024-01-24",
+        )
+        # the archive threshold is measured from the last modification
+        Task.objects.filter(id__in=[self.old_task.id, self.open_task.id]).update(
+            modified=timezone.now() - timedelta(days=200)
+        )
+
+    def test_archive_moves_old_completed_tasks(self):
+        call_command("archive_tasks", days=90, batch_size=1, stdout=StringIO())
+        self.assertFalse(Task.objects.filter(id=self.old_task.id).exists())
+        self.assertTrue(Task.objects.filter(id=self.open_task.id).exists())
+        archived = ArchivedTask.objects.get(id=self.old_task.id)
+        self.assertEqual(archived.title, "old task")
+        self.assertEqual(archived.comments.get().content, "old comment")
+        self.assertFalse(Comment.objects.exists())
+
+    def test_archived_task_is_reachable(self):
+        call_command("archive_tasks", days=90, stdout=StringIO())
+        self.client.login(email="testuser@gmail.com", password="12345")
+        response = self.client.get(reverse("task_detail", args=[self.old_task.id]))
+        self.assertContains(response, "old comment")
+        self.assertContains(response, "comments are closed")
+        response = self.client.get(reverse("search"), {"keyword": "completed"})
+        self.assertContains(response, "old task")
+
+    def test_archiving_records_archived_not_deleted_events(self):
+        call_command("archive_tasks", days=90, stdout=StringIO())
+        actions = list(
+            TaskEvent.objects.filter(model="task", object_id=self.old_task.id)
+            .order_by("id")
+            .values_list("action", flat=True)
+        )
+        self.assertEqual(actions, ["created", "archived"])
+
+
+class TestSoftDeleteTask(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.task = Task.objects.create(
+            title="test task",
+            description="this is test task",
+            assigned_to=self.user,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+        )
+        Comment.objects.create(
+            content="a comment", task=self.task, commented_by=self.user
+        )
+        self.client.login(email="testuser@gmail.com", password="12345")
+
+    def test_delete_can_be_undone(self):
+        self.client.post(reverse("delete_task", args=[self.task.id]))
+        self.assertTrue(Task.all_objects.filter(id=self.task.id).exists())
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, reverse("restore_task", args=[self.task.id]))
+        self.client.post(reverse("restore_task", args=[self.task.id]))
+        self.assertTrue(Task.objects.filter(id=self.task.id).exists())
+
+    def test_purge_removes_expired_tasks(self):
+        self.task.soft_delete()
+        call_command("purge_deleted_tasks", stdout=StringIO())
+        self.assertTrue(Task.all_objects.filter(id=self.task.id).exists())
+        Task.all_objects.filter(id=self.task.id).update(
+            deleted_at=timezone.now() - timedelta(days=1)
+        )
+        call_command("purge_deleted_tasks", batch_size=1, stdout=StringIO())
+        self.assertFalse(Task.all_objects.filter(id=self.task.id).exists())
+        self.assertFalse(Comment.objects.exists())
+
+
+@override_settings(TASK_EVENT_SETTLE_SECONDS=0)
+class TestSyncView(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        self.task = Task.objects.create(
+            title="test task",
+            description="this is test task",
+            assigned_to=self.user2,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+        )
+        self.url = reverse("sync")
+        self.client.login(email="testuser@gmail.com", password="12345")
+
+    def test_returns_only_changes_after_token(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual([e["action"] for e in data["events"]], ["created"])
+        token = data["next"]
+
+        self.task.title = "renamed"
+        self.task.save()
+        Comment.objects.create(content="hi", task=self.task, commented_by=self.user)
+        self.task.soft_delete()
+
+        data = self.client.get(self.url, {"since": token}).json()
+        self.assertEqual(
+            [(e["model"], e["action"]) for e in data["events"]],
+            [("task", "updated"), ("comment", "created"), ("task", "deleted")],
+        )
+        self.assertEqual(data["events"][0]["data"]["title"], "renamed")
+        self.assertEqual(data["events"][0]["data"]["priority"], "high")
+        data = self.client.get(self.url, {"since": data["next"]}).json()
+        self.assertEqual(data["events"], [])
+
+    def test_batches_are_bounded(self):
+        for i in range(3):
+            self.task.save()
+        data = self.client.get(self.url, {"limit": 2}).json()
+        self.assertEqual(len(data["events"]), 2)
+        self.assertTrue(data["has_more"])
+
+    def test_events_of_other_users_are_hidden(self):
+        User.objects.create_user(email="other@gmail.com", password="1234")
+        self.client.login(email="other@gmail.com", password="1234")
+        self.assertEqual(self.client.get(self.url).json()["events"], [])
+
+    def test_compaction_keeps_latest_event(self):
+        self.task.save()
+        self.task.save()
+        TaskEvent.objects.update(created=timezone.now() - timedelta(days=30))
+        call_command("compact_task_events", stdout=StringIO())
+        self.assertEqual(
+            list(TaskEvent.objects.values_list("action", flat=True)), ["updated"]
+        )
+
+    def reassign(self):
+        user3 = User.objects.create_user(email="testuser3@gmail.com", password="1")
+        task = Task.objects.get(id=self.task.id)
+        task.assigned_to = user3
+        task.save()
+        self.client.login(email="testuser2@gmail.com", password="1234")
+
+    def test_previous_assignee_gets_revoked_event(self):
+        token = self.client.get(self.url).json()["next"]
+        self.reassign()
+        data = self.client.get(self.url, {"since": token}).json()
+        self.assertEqual(
+            [(e["id"], e["action"]) for e in data["events"]],
+            [(self.task.id, "revoked")],
+        )
+
+    def test_compaction_keeps_events_of_previous_assignee(self):
+        self.reassign()
+        Task.objects.get(id=self.task.id).save()
+        TaskEvent.objects.update(created=timezone.now() - timedelta(days=30))
+        call_command("compact_task_events", stdout=StringIO())
+        data = self.client.get(self.url).json()
+        self.assertEqual(data["events"][-1]["action"], "revoked")
+
+    @override_settings(TASK_EVENT_SETTLE_SECONDS=60)
+    def test_fresh_events_wait_for_earlier_commits(self):
+        TaskEvent.objects.update(created=timezone.now() - timedelta(minutes=5))
+        self.task.save()
+        data = self.client.get(self.url).json()
+        self.assertEqual([e["action"] for e in data["events"]], ["created"])
+        self.assertFalse(data["has_more"])
+        # the fresh event is served once it is old enough
+        data = self.client.get(self.url, {"since": data["next"]}).json()
+        self.assertEqual(data["events"], [])
+        TaskEvent.objects.update(created=timezone.now() - timedelta(minutes=5))
+        data = self.client.get(self.url, {"since": data["next"]}).json()
+        self.assertEqual([e["action"] for e in data["events"]], ["updated"])
+
+
+class TestDashboard(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.client.login(email="testuser@gmail.com", password="12345")
+        for title in ("task 1", "task 2"):
+            self.client.post(
+                reverse("create_task"),
+                {
+                    "title": title,
+                    "description": "dashboard task",
+                    "assigned_to": self.user.id,
+                    "due_date": "2024-12-24",
+                    "priority": "high",
+                },
+            )
+        self.task = Task.objects.order_by("id").first()
+
+    def test_stats_follow_status_changes(self):
+        self.client.post(
+            reverse("update_mytask", args=[self.task.id]), {"status": "completed"}
+        )
+        stats = UserTaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.open_count, stats.completed_count), (1, 1))
+        today = DailyTaskStats.objects.get(day=timezone.localdate())
+        self.assertEqual((today.created_count, today.completed_count), (2, 1))
+        self.assertEqual(DueDateStats.objects.get().open_count, 1)
+
+    def test_backfill_matches_incremental_stats(self):
+        self.client.post(reverse("delete_task", args=[self.task.id]))
+        expected = list(UserTaskStats.objects.values("open_count", "completed_count"))
+        call_command("backfill_task_stats", stdout=StringIO())
+        self.assertEqual(
+            list(UserTaskStats.objects.values("open_count", "completed_count")),
+            expected,
+        )
+
+    def test_dashboard(self):
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["open_count"], 2)
+        self.assertEqual(response.context["overdue_count"], 2)
+
+    def test_dashboard_only_counts_the_users_workspace(self):
+        acme = Workspace.objects.create(name="Acme", slug="acme")
+        User.objects.create_user(
+            email="acme@gmail.com", password="12345", workspace=acme
+        )
+        self.client.login(email="acme@gmail.com", password="12345")
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["open_count"], 0)
+        self.assertEqual(response.context["overdue_count"], 0)
+        self.assertEqual(list(response.context["workload"]), [])
+        self.assertNotContains(response, "testuser@gmail.com")
+
+
+class TestSendReminders(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        today = timezone.localdate()
+        for title, due_date in (
+            ("due tomorrow", today + timedelta(days=1)),
+            ("overdue", today - timedelta(days=2)),
+            ("far away", today + timedelta(days=30)),
+        ):
+            Task.objects.create(
+                title=title,
+                description="reminder task",
+                assigned_to=self.user2,
+                assigned_by=self.user,
+                due_date=due_date,
+            )
+
+    def test_reminders_are_sent_once(self):
+        call_command("send_reminders", batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox),
+            ["Task Due Soon: due tomorrow", "Task Overdue: overdue"],
+        )
+        call_command("send_reminders", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_new_tasks_behind_the_high_water_mark_are_found(self):
+        call_command("send_reminders", stdout=StringIO())
+        Task.objects.create(
+            title="late addition",
+            description="reminder task",
+            assigned_to=self.user2,
+            assigned_by=self.user,
+            due_date=timezone.localdate(),
+        )
+        call_command("send_reminders", stdout=StringIO())
+        self.assertEqual(mail.outbox[-1].subject, "Task Due Soon: late addition")
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_moved_and_reopened_tasks_are_reminded_again(self):
+        call_command("send_reminders", stdout=StringIO())
+        task = Task.objects.get(title="far away")
+        task.due_date = timezone.localdate()
+        task.save()
+        overdue = Task.objects.get(title="overdue")
+        overdue.complete = True
+        overdue.save()
+        overdue = Task.objects.get(title="overdue")
+        overdue.complete = False
+        overdue.save()
+        call_command("send_reminders", stdout=StringIO())
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox[2:]),
+            ["Task Due Soon: far away", "Task Overdue: overdue"],
+        )
+
+    def test_runs_continue_from_the_high_water_mark(self):
+        call_command("send_reminders", stdout=StringIO())
+        cursor = ReminderCursor.objects.get(kind="due_soon")
+        self.assertEqual(cursor.last_due_date, timezone.localdate() + timedelta(days=1))
+        # tasks behind the mark that did not change since are not scanned again
+        TaskReminder.objects.all().delete()
+        Task.objects.update(modified=timezone.now() - timedelta(hours=1))
+        call_command("send_reminders", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_restored_tasks_are_reminded_about(self):
+        task = Task.objects.get(title="due tomorrow")
+        task.soft_delete()
+        call_command("send_reminders", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        Task.all_objects.update(modified=timezone.now() - timedelta(hours=1))
+        task.restore()
+        call_command("send_reminders", stdout=StringIO())
+        self.assertEqual(mail.outbox[-1].subject, "Task Due Soon: due tomorrow")
+
+
+class TestWorkspaces(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.acme = Workspace.objects.create(name="Acme", slug="acme")
+        self.globex = Workspace.objects.create(name="Globex", slug="globex")
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345", workspace=self.acme
+        )
+        self.colleague = User.objects.create_user(
+            email="colleague@gmail.com", password="1234", workspace=self.acme
+        )
+        self.outsider = User.objects.create_user(
+            email="outsider@gmail.com", password="1234", workspace=self.globex
+        )
+        for title, workspace, user in (
+            ("acme task", self.acme, self.user),
+            ("globex task", self.globex, self.outsider),
+        ):
+            Task.objects.create(
+                title=title,
+                description="workspace task",
+                assigned_to=user,
+                assigned_by=user,
+                due_date="2024-12-24",
+                workspace=workspace,
+            )
+        self.client.login(email="testuser@gmail.com", password="12345")
+
+    def test_lists_are_scoped_to_the_workspace(self):
+        response = self.client.get(reverse("all_task"))
+        self.assertContains(response, "acme task")
+        self.assertNotContains(response, "globex task")
+        response = self.client.get(reverse("search"), {"keyword": "inprogress"})
+        self.assertContains(response, "acme task")
+        self.assertNotContains(response, "globex task")
+
+    def test_only_workspace_members_can_be_assigned(self):
+        response = self.client.get(reverse("create_task"))
+        assignees = response.context["form"].fields["assigned_to"].queryset
+        self.assertCountEqual(assignees, [self.user, self.colleague])
+
+    def test_router_uses_the_workspace_alias(self):
+        router = WorkspaceRouter()
+        self.globex.db_alias = "globex"
+        task = Task(workspace=self.globex)
+        self.assertEqual(router.db_for_write(Task, instance=task), "globex")
+        token = set_active_workspace(self.globex)
+        try:
+            self.assertEqual(router.db_for_read(Comment), "globex")
+            self.assertEqual(router.db_for_read(User), "default")
+        finally:
+            reset_active_workspace(token)
+
+
+@skipUnless(
+    "workspace_shard" in settings.DATABASES,
+    "needs a second database alias named workspace_shard",
+)
+class TestWorkspaceShard(TestCase):
+    databases = {"default", "workspace_shard"}
+
+    def test_tasks_are_stored_on_the_workspace_database(self):
+        workspace = Workspace.objects.create(
+            name="Big", slug="big", db_alias="workspace_shard"
+        )
+        user = User.objects.create_user(
+            email="big@gmail.com", password="12345", workspace=workspace
+        )
+        self.client.login(email="big@gmail.com", password="12345")
+        self.client.post(
+            reverse("create_task"),
+            {
+                "title": "sharded task",
+                "description": "workspace task",
+                "assigned_to": user.id,
+                "due_date": "2024-12-24",
+                "priority": "high",
+            },
+        )
+        task = Task.objects.using("workspace_shard").get()
+        self.assertFalse(Task.objects.using("default").filter(id=task.id).exists())
+        self.assertFalse(Task.objects.using("default").exists())
+        response = self.client.get(reverse("all_task"))
+        self.assertContains(response, "sharded task")
+
+    def test_ids_are_unique_across_databases(self):
+        workspace = Workspace.objects.create(
+            name="Big", slug="big", db_alias="workspace_shard"
+        )
+        user = User.objects.create_user(email="big@gmail.com", password="1")
+        fields = {"description": "", "assigned_to": user, "assigned_by": user}
+        local = Task.objects.create(title="local", due_date="2024-12-24", **fields)
+        with active_workspace(workspace):
+            sharded = Task.objects.create(
+                title="sharded", due_date="2024-12-24", workspace=workspace, **fields
+            )
+        self.assertEqual(sharded._state.db, "workspace_shard")
+        self.assertGreater(sharded.id, local.id)
+        self.assertGreater(sharded.id, settings.DATABASES["workspace_shard"]["ID_OFFSET"])
+
+    def test_commands_visit_every_database(self):
+        workspace = Workspace.objects.create(
+            name="Big", slug="big", db_alias="workspace_shard"
+        )
+        user = User.objects.create_user(
+            email="big@gmail.com", password="1", workspace=workspace
+        )
+        with active_workspace(workspace):
+            task = Task.objects.create(
+                title="done",
+                description="",
+                assigned_to=user,
+                assigned_by=user,
+                due_date="2024-12-24",
+                complete=True,
+                workspace=workspace,
+            )
+        Task.objects.using("workspace_shard").filter(id=task.id).update(
+            modified=timezone.now() - timedelta(days=200)
+        )
+        call_command("archive_tasks", days=90, stdout=StringIO())
+        self.assertFalse(Task.objects.using("workspace_shard").exists())
+        self.assertEqual(ArchivedTask.objects.get().id, task.id)
+        call_command("backfill_task_stats", stdout=StringIO())
+        stats = UserTaskStats.objects.get(user=user)
+        self.assertEqual(stats.workspace, workspace)
+        self.assertEqual(stats.completed_count, 1)
+
+    def test_workspace_database_alias_is_validated(self):
+        workspace = Workspace(name="Big", slug="big", db_alias="missing")
+        with self.assertRaises(ValidationError):
+            workspace.full_clean()
+
+
+class TestRateLimit(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+
+    @override_settings(RATE_LIMITS={"login": {"ip": "2/m"}})
+    def test_login_is_limited_per_ip(self):
+        data = {"email": "testuser@gmail.com", "password": "wrong"}
+        # half way through a one minute window
+        with mock.patch("taskapp.ratelimit.time.time", return_value=60 * 1000 + 30):
+            for _ in range(2):
+                response = self.client.post(reverse("login"), data)
+                self.assertEqual(response.status_code, 200)
+            response = self.client.post(reverse("login"), data)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response["Retry-After"], "30")
+            self.assertEqual(self.client.get(reverse("login")).status_code, 200)
+
+    @override_settings(RATE_LIMITS={"login": {"username": "2/h"}})
+    def test_login_is_limited_per_account_across_ips(self):
+        for index, email in enumerate(
+            ["testuser@gmail.com", " TestUser@gmail.com", "testuser@gmail.com"]
+        ):
+            response = self.client.post(
+                reverse("login"),
+                {"email": email, "password": "wrong"},
+                REMOTE_ADDR=f"10.0.0.{index}",
+            )
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            reverse("login"), {"email": "other@gmail.com", "password": "wrong"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_concurrent_requests_cannot_pass_the_limit_together(self):
+        allowed = []
+        barrier = threading.Barrier(20)
+
+        def request():
+            barrier.wait()
+            allowed.append(count_request("ratelimit:test", "5/h") == 0)
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 5)
+
+    def test_bursts_around_a_window_boundary_stay_within_the_limit(self):
+        # the last second of one window and the first of the next
+        with mock.patch("taskapp.ratelimit.time.time", return_value=60 * 1000 - 1):
+            allowed = [count_request("ratelimit:test", "10/m") == 0 for _ in range(10)]
+        self.assertEqual(allowed.count(True), 10)
+        with mock.patch("taskapp.ratelimit.time.time", return_value=60 * 1000 + 1):
+            self.assertGreater(count_request("ratelimit:test", "10/m"), 0)
+        # the previous window weighs less as the sliding window moves on
+        with mock.patch("taskapp.ratelimit.time.time", return_value=60 * 1000 + 31):
+            allowed = [count_request("ratelimit:test", "10/m") == 0 for _ in range(10)]
+        self.assertLess(allowed.count(True), 10)
+
+    @override_settings(RATE_LIMITS={"comment": {"user": "1/h"}})
+    def test_comments_are_limited_per_user(self):
+        task = Task.objects.create(
+            title="test task",
+            description="this is test task",
+            assigned_to=self.user,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+        )
+        self.client.login(email="testuser@gmail.com", password="12345")
+        url = reverse("task_detail", args=[task.id])
+        self.client.post(url, {"content": "first"})
+        response = self.client.post(url, {"content": "second"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class TestImportUsers(TestCase):
+    def setUp(self):
+        User.objects.create_user(email="existing@gmail.com", password="12345")
+
+    def test_bulk_create_users(self):
+        rows = [
+            {"email": "  new@GMAIL.com", "first_name": "New", "password": "secret"},
+            {"email": "existing@gmail.com", "password": "secret"},
+            {"email": "new@gmail.com", "password": "again"},
+            {"email": "hashed@gmail.com", "password_hash": make_password("hashed")},
+        ]
+        created, duplicates, invalid = User.objects.bulk_create_users(
+            rows, batch_size=2, workers=1
+        )
+        self.assertEqual(created, 2)
+        self.assertEqual(invalid, [])
+        self.assertEqual(duplicates, ["existing@gmail.com", "new@gmail.com"])
+        self.assertTrue(User.objects.get(email="new@gmail.com").check_password("secret"))
+        self.assertTrue(
+            User.objects.get(email="hashed@gmail.com").check_password("hashed")
+        )
+
+    def test_import_users_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("email,first_name,last_name,password\n")
+            f.write("a@gmail.com,A,One,pw1\nexisting@gmail.com,E,Two,pw2\n")
+        out = StringIO()
+        call_command("import_users", f.name, workers=1, stdout=out)
+        os.unlink(f.name)
+        self.assertIn("Created 1 user(s), skipped 1 duplicate(s)", out.getvalue())
+        self.assertEqual(User.objects.get(email="a@gmail.com").last_name, "One")
+
+    def test_rows_without_email_are_skipped_and_reported(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("email,first_name,last_name,password\n")
+            f.write(",A,One,pw1\nshort@gmail.com\nb@gmail.com,B,Two,pw2\n")
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_users", f.name, workers=1, batch_size=1, stdout=out, stderr=err
+        )
+        os.unlink(f.name)
+        self.assertIn("Created 2 user(s)", out.getvalue())
+        self.assertIn("Skipped line 2, it has no email", err.getvalue())
+        self.assertEqual(User.objects.get(email="short@gmail.com").first_name, "")
+
+
+class TestStartup(SimpleTestCase):
+    def test_urlconf_does_not_import_views(self):
+        script = (
+            "import sys, django; django.setup(); import taskproject.urls; "
+            "print('taskapp.views' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        self.assertEqual(result.stdout.strip(), "False", result.stderr)
+
+    def test_warm_up(self):
+        loaded = warm_up()
+        self.assertGreater(loaded["views"], 0)
+        self.assertGreater(loaded["templates"], 0)
+        match = resolve(reverse("home"))
+        self.assertIsInstance(match.func, LazyView)
+        self.assertIsNotNone(match.func._view)
+
+    def test_setup_skips_lazily_loaded_modules(self):
+        # the import graph rather than the time, which varies between machines
+        lazy = ["taskapp.views", "taskapp.forms", "taskapp.attachments", "smtplib"]
+        script = (
+            "import sys, django; django.setup(); import taskproject.urls; "
+            f"print([name for name in {lazy!r} if name in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        self.assertEqual(result.stdout.strip(), "[]", result.stderr)
+
+    def test_measure_startup(self):
+        timings, imports = measure_startup(warm_up=False, importtime=True)
+        self.assertEqual(set(timings), {"setup", "warm_up", "total"})
+        self.assertIn("django", [module for _, _, module in imports])
+
+    def test_startup_stays_within_the_budget(self):
+        timings, _ = measure_startup()
+        self.assertLessEqual(timings["total"], settings.STARTUP_BUDGET_SECONDS)
+
+    def test_profile_startup_fails_over_the_budget(self):
+        with self.assertRaisesMessage(CommandError, "the budget is 0.0s"):
+            call_command(
+                "profile_startup", "--no-warm-up", budget=0.0, stdout=StringIO()
+            )
+
+    def test_lazy_views_forward_the_view_attributes(self):
+        match = resolve(reverse("upload_attachment", args=[1]))
+        self.assertTrue(match.func.csrf_exempt)
+        self.assertIs(match.func.view_class, AttachmentUploadView)
+        self.assertEqual(match.func.view_initkwargs, {})
+
+
+class TestTaskListSorting(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        rows = [
+            ("low soon", PRIORITY_LOW, "2024-12-01"),
+            ("high late", PRIORITY_HIGH, "2024-12-24"),
+            ("medium", PRIORITY_MEDIUM, "2024-12-10"),
+            ("high soon", PRIORITY_HIGH, "2024-12-02"),
+        ]
+        for title, priority, due_date in rows:
+            Task.objects.create(
+                title=title,
+                description="sorted task",
+                assigned_by=self.user,
+                priority=priority,
+                due_date=due_date,
+            )
+        self.client.login(email="testuser@gmail.com", password="12345")
+
+    def titles(self, response):
+        return [task.title for task in response.context["tasks"]]
+
+    def test_priority_form_accepts_names(self):
+        self.client.post(
+            reverse("create_task"),
+            {
+                "title": "named priority",
+                "description": "form task",
+                "assigned_to": self.user.id,
+                "due_date": "2024-12-24",
+                "priority": "medium",
+            },
+        )
+        task = Task.objects.get(title="named priority")
+        self.assertEqual(task.priority, PRIORITY_MEDIUM)
+        response = self.client.get(reverse("edit_task", args=[task.id]))
+        self.assertEqual(response.context["form"].initial["priority"], "medium")
+
+    def test_default_sort_is_priority_then_due_date(self):
+        response = self.client.get(reverse("home"))
+        self.assertEqual(
+            self.titles(response), ["high soon", "high late", "medium", "low soon"]
+        )
+
+    def test_sort_and_filter(self):
+        response = self.client.get(reverse("home"), {"sort": "due_date"})
+        self.assertEqual(
+            self.titles(response), ["low soon", "high soon", "medium", "high late"]
+        )
+        response = self.client.get(
+            reverse("home"), {"priority": "high", "due_before": "2024-12-10"}
+        )
+        self.assertEqual(self.titles(response), ["high soon"])
+        response = self.client.get(reverse("home"), {"sort": "bogus,-priority"})
+        self.assertEqual(response.context["sort"], "-priority")
+
+    def test_upcoming_tasks_default_to_assignment_order(self):
+        Task.objects.update(assigned_to=self.user)
+        response = self.client.get(reverse("my_task"))
+        self.assertEqual(response.context["current_task"].title, "low soon")
+        self.assertEqual(
+            [task.title for task in response.context["incomplete_task"]],
+            ["high late", "medium", "high soon"],
+        )
+        self.assertEqual(response.context["sort"], "")
+        response = self.client.get(reverse("my_task"), {"sort": "-priority,due_date"})
+        self.assertEqual(
+            [task.title for task in response.context["incomplete_task"]],
+            ["high soon", "high late", "medium"],
+        )
+
+    def test_keyset_pagination(self):
+        with mock.patch.object(TaskListMixin, "page_size", 3):
+            response = self.client.get(reverse("home"))
+            self.assertEqual(len(response.context["tasks"]), 3)
+            next_url = response.context["next_url"]
+            response = self.client.get(reverse("home") + next_url)
+        self.assertEqual(self.titles(response), ["low soon"])
+        self.assertIsNone(response.context["next_url"])
+
+    def test_keyset_paginator_mixed_directions(self):
+        paginator = KeysetPaginator(
+            Task.objects.all(), ["-priority", "due_date"], per_page=1
+        )
+        titles = []
+        cursor = None
+        while True:
+            page = paginator.page(cursor)
+            titles += [task.title for task in page]
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(titles, ["high soon", "high late", "medium", "low soon"])
+        with self.assertRaises(ValueError):
+            paginator.page("not a cursor")
+
+
+class TestTaskDependencies(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        self.a, self.b, self.c = (
+            Task.objects.create(
+                title=title,
+                description="dependency task",
+                assigned_to=assignee,
+                assigned_by=self.user,
+                due_date="2024-12-24",
+            )
+            for title, assignee in (
+                ("a", self.user2),
+                ("b", self.user),
+                ("c", self.user2),
+            )
+        )
+        # a waits for b, c waits for a
+        add_dependency(self.a, self.b)
+        add_dependency(self.c, self.a)
+
+    def refresh(self):
+        for task in (self.a, self.b, self.c):
+            task.refresh_from_db()
+
+    def test_blocked_counts(self):
+        self.refresh()
+        self.assertTrue(self.a.blocked)
+        self.assertFalse(self.b.blocked)
+        self.assertTrue(self.c.blocked)
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            add_dependency(self.b, self.c)
+        with self.assertRaises(ValidationError):
+            add_dependency(self.a, self.a)
+        self.assertEqual(TaskDependency.objects.count(), 2)
+
+    def test_completing_unblocks_dependents(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.client.post(
+            reverse("update_mytask", args=[self.b.id]), {"status": "completed"}
+        )
+        self.refresh()
+        self.assertFalse(self.a.blocked)
+        self.assertTrue(self.c.blocked)
+
+    def test_delete_and_restore_update_dependents(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.client.post(reverse("delete_task", args=[self.b.id]))
+        self.refresh()
+        self.assertFalse(self.a.blocked)
+        self.client.post(reverse("restore_task", args=[self.b.id]))
+        self.refresh()
+        self.assertTrue(self.a.blocked)
+
+    def test_blocked_task_cannot_be_updated(self):
+        self.client.login(email="testuser2@gmail.com", password="1234")
+        response = self.client.post(
+            reverse("update_mytask", args=[self.a.id]), {"status": "completed"}
+        )
+        self.assertRedirects(response, reverse("my_task"))
+        self.refresh()
+        self.assertFalse(self.a.complete)
+
+    def test_ready_queue(self):
+        self.client.login(email="testuser2@gmail.com", password="1234")
+        self.assertEqual(self.client.get(reverse("ready_queue")).json()["tasks"], [])
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.client.post(
+            reverse("update_mytask", args=[self.b.id]), {"status": "completed"}
+        )
+        self.client.login(email="testuser2@gmail.com", password="1234")
+        tasks = self.client.get(reverse("ready_queue")).json()["tasks"]
+        self.assertEqual([task["id"] for task in tasks], [self.a.id])
+
+    def test_ready_queue_matches_update_rule(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.client.post(
+            reverse("update_mytask", args=[self.b.id]), {"status": "completed"}
+        )
+        d, e = (
+            Task.objects.create(
+                title=title,
+                description="dependency task",
+                assigned_to=self.user2,
+                assigned_by=self.user,
+                due_date="2024-12-24",
+            )
+            for title in ("d", "e")
+        )
+        add_dependency(e, self.b)
+        self.client.login(email="testuser2@gmail.com", password="1234")
+        tasks = self.client.get(reverse("ready_queue")).json()["tasks"]
+        # d waits for c, the task assigned before it, e is ordered by its
+        # dependency only
+        self.assertEqual({task["id"] for task in tasks}, {self.a.id, e.id})
+        for task in (d, e):
+            self.client.post(
+                reverse("update_mytask", args=[task.id]), {"status": "completed"}
+            )
+            task.refresh_from_db()
+        self.assertFalse(d.complete)
+        self.assertTrue(e.complete)
+
+    def test_dependency_race_becomes_form_error(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        cycle = ValidationError("adding this dependency would create a cycle.")
+        with mock.patch("taskapp.views.set_dependencies", side_effect=cycle):
+            response = self.client.post(
+                reverse("create_task"),
+                {
+                    "title": "racing",
+                    "description": "dependency task",
+                    "assigned_to": self.user.id,
+                    "due_date": "2024-12-24",
+                    "priority": "high",
+                    "depends_on": [self.c.id],
+                },
+            )
+        self.assertIn("depends_on", response.context["form"].errors)
+        self.assertFalse(Task.objects.filter(title="racing").exists())
+        self.assertFalse(TaskEvent.objects.filter(payload__title="racing").exists())
+
+    def test_edit_form_rejects_cycle(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        response = self.client.post(
+            reverse("edit_task", args=[self.b.id]),
+            {
+                "title": "b",
+                "description": "dependency task",
+                "assigned_to": self.user.id,
+                "due_date": "2024-12-24",
+                "priority": "high",
+                "depends_on": [self.c.id],
+            },
+        )
+        self.assertIn("depends_on", response.context["form"].errors)
+        self.assertFalse(TaskDependency.objects.filter(task=self.b).exists())
+
+    def test_refresh_blocked_tasks_command(self):
+        Task.objects.filter(id=self.a.id).update(blocked_by_count=5)
+        out = StringIO()
+        call_command("refresh_blocked_tasks", stdout=out)
+        self.assertIn("Fixed 1 task(s)", out.getvalue())
+        self.refresh()
+        self.assertEqual(self.a.blocked_by_count, 1)
+
+
+class TestBulkUpdateMyTask(TestCase):
+    def setUp(self):
+        self.assigner = User.objects.create_user(
+            email="assigner@gmail.com", password="12345"
+        )
+        self.assigner2 = User.objects.create_user(
+            email="assigner2@gmail.com", password="12345"
+        )
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.tasks = [
+            Task.objects.create(
+                title=f"task {index}",
+                description="bulk task",
+                assigned_to=self.user,
+                assigned_by=assigner,
+                due_date="2024-12-24",
+            )
+            for index, assigner in enumerate(
+                [self.assigner, self.assigner2, self.assigner]
+            )
+        ]
+        self.url = reverse("bulk_update_mytask")
+        self.client.login(email="testuser@gmail.com", password="12345")
+
+    def test_bulk_update_form(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {"task_ids": [task.id for task in self.tasks], "status": "completed"},
+            )
+        self.assertRedirects(response, reverse("my_task"))
+        self.assertEqual(Task.objects.filter(complete=True).count(), 3)
+        # one message per assigner
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["assigner2@gmail.com", "assigner@gmail.com"],
+        )
+        self.assertEqual(
+            UserTaskStats.objects.get(user=self.user).completed_count, 3
+        )
+        self.assertEqual(
+            TaskEvent.objects.filter(model="task", action="updated").count(), 3
+        )
+
+    def test_row_links_are_outside_the_bulk_form(self):
+        content = self.client.get(reverse("my_task")).content.decode()
+        form = content.split('id="bulk-form"')[1].split("</form>")[0]
+        self.assertEqual(form.count("<button"), 1)
+        self.assertNotIn("<a ", form)
+        self.assertIn("Update</a>", content)
+        checkboxes = content.count('name="task_ids"')
+        self.assertGreater(checkboxes, 0)
+        self.assertEqual(content.count('form="bulk-form"'), checkboxes)
+
+    def test_batch_is_validated_as_a_whole(self):
+        # the previous task is not completed and not part of the batch
+        response = self.client.post(
+            self.url,
+            {"task_ids": [self.tasks[0].id, self.tasks[2].id], "status": "completed"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()["errors"]), 1)
+        self.assertFalse(Task.objects.filter(complete=True).exists())
+
+    def test_bulk_update_json(self):
+        other = Task.objects.create(
+            title="not mine",
+            description="bulk task",
+            assigned_to=self.assigner,
+            assigned_by=self.assigner,
+            due_date="2024-12-24",
+        )
+        response = self.client.post(
+            self.url,
+            {"task_ids": [self.tasks[0].id, other.id], "status": "completed"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            self.url,
+            {"task_ids": [self.tasks[0].id, self.tasks[1].id], "status": "completed"},
+            content_type="application/json",
+        )
+        self.assertEqual(
+            response.json(), {"updated": [self.tasks[0].id, self.tasks[1].id]}
+        )
+
+
+class TestCalendarFeed(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        self.task = Task.objects.create(
+            title="Write report, part 1",
+            description="calendar task",
+            assigned_to=self.user2,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+            priority=PRIORITY_HIGH,
+        )
+        self.url = reverse("calendar_feed", args=[self.user2.get_calendar_token()])
+
+    def test_feed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = response.content.decode()
+        self.assertIn("SUMMARY:Write report\\, part 1\r\n", body)
+        self.assertIn("DTSTART;VALUE=DATE:20241224\r\n", body)
+        self.assertIn("PRIORITY:1\r\n", body)
+        self.assertTrue(response.has_header("ETag"))
+
+    def test_unknown_token(self):
+        response = self.client.get(reverse("calendar_feed", args=["nope"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_modified_until_a_task_changes(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = "Renamed"
+            self.task.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("SUMMARY:Renamed", response.content.decode())
+
+    def test_reassignment_updates_previous_assignee(self):
+        etag = self.client.get(self.url)["ETag"]
+        task = Task.objects.get(id=self.task.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.assigned_to = self.user
+            task.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotIn("BEGIN:VEVENT", response.content.decode())
+
+    def test_reset_token(self):
+        self.client.login(email="testuser2@gmail.com", password="1234")
+        self.client.post(reverse("reset_calendar_token"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class TestLoadTest(TransactionTestCase):
+    def test_percentile(self):
+        values = [i / 100 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.5)
+        self.assertEqual(percentile(values, 99), 0.99)
+        self.assertEqual(percentile([0.2], 95), 0.2)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_parse_mix(self):
+        self.assertEqual(
+            parse_mix("task_list=3,detail=1"), {"task_list": 3, "detail": 1}
+        )
+        with self.assertRaises(ValueError):
+            parse_mix("unknown=1")
+
+    def run_load(self, users, mix):
+        (host, port), stop = start_server("wsgi")
+        try:
+            stats, duration = asyncio.run(
+                drive(
+                    host,
+                    port,
+                    plan_users(users),
+                    [user.id for user in users],
+                    parse_mix(mix),
+                    0.5,
+                )
+            )
+        finally:
+            stop()
+        total = stats.report(duration)[-1]
+        self.assertEqual(total["endpoint"], "total")
+        self.assertGreater(total["requests"], 0)
+        return total
+
+    @override_settings(RATE_LIMITS={}, ALLOWED_HOSTS=["127.0.0.1"])
+    def test_drive_wsgi_server(self):
+        users = seed(3, 5)
+        # one writing user, SQLite's shared in-memory test database reports
+        # concurrent writers as locked tables
+        total = self.run_load(users[:1], "task_list=1,detail=1,create=1,update=1")
+        self.assertEqual(total["errors"], 0)
+
+    @override_settings(RATE_LIMITS={}, ALLOWED_HOSTS=["127.0.0.1"])
+    def test_concurrent_virtual_users(self):
+        users = seed(3, 5)
+        # pages that only read, see above
+        total = self.run_load(users, "task_list=1,all_tasks=1,search=1")
+        self.assertEqual(total["errors"], 0)
+
+    @override_settings(RATE_LIMITS={}, ALLOWED_HOSTS=["127.0.0.1"])
+    def test_login_redirects_are_errors(self):
+        users = seed(2, 2)
+        with mock.patch.object(VirtualUser, "setup"):
+            total = self.run_load(users, "task_list=1,my_tasks=1")
+        self.assertEqual(total["errors"], total["requests"])
+
+
+class TestSearchCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        search._suggestion_index.clear()
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345", first_name="Grace"
+        )
+        self.task = Task.objects.create(
+            title="Cached task",
+            description="search task",
+            assigned_to=self.user,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+            status="inprogress",
+        )
+
+    def search_ids(self, keyword):
+        return [row.id for row in search.cached_search(None, keyword)]
+
+    def test_results_are_cached(self):
+        self.assertEqual(self.search_ids("InProgress"), [self.task.id])
+        # only the rows are loaded, by primary key, and their user names
+        with self.assertNumQueries(2):
+            self.assertEqual(self.search_ids(" inprogress "), [self.task.id])
+
+    def test_task_change_invalidates(self):
+        self.assertEqual(self.search_ids("inprogress"), [self.task.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = "completed"
+            self.task.save()
+        self.assertEqual(self.search_ids("inprogress"), [])
+        self.assertEqual(self.search_ids("completed"), [self.task.id])
+
+    def test_search_view(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        response = self.client.get(reverse("search"), {"keyword": "grace"})
+        self.assertEqual([row.id for row in response.context["tasks"]], [self.task.id])
+
+    def test_suggestions(self):
+        self.assertEqual(search.suggest(None, "gr"), ["Grace"])
+        self.assertEqual(search.suggest(None, "IN"), ["inprogress"])
+        self.assertEqual(search.suggest(None, "c"), ["completed"])
+        self.assertEqual(search.suggest(None, "x"), [])
+        self.assertEqual(search.suggest(None, " "), [])
+
+    def test_suggest_view(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        response = self.client.get(reverse("search_suggest"), {"q": "g"})
+        self.assertEqual(response.json(), {"suggestions": ["Grace"]})
+
+
+class TestUnreadComments(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        self.tasks = [
+            Task.objects.create(
+                title=f"Task {index}",
+                description="unread task",
+                assigned_to=self.user2,
+                assigned_by=self.user,
+                due_date="2024-12-24",
+            )
+            for index in range(3)
+        ]
+        for task in self.tasks[:2]:
+            Comment.objects.create(content="Hi", task=task, commented_by=self.user2)
+        # own comments are never unread
+        Comment.objects.create(
+            content="Mine", task=self.tasks[0], commented_by=self.user
+        )
+
+    def test_counts_in_one_query(self):
+        task_ids = [task.id for task in self.tasks]
+        with self.assertNumQueries(1):
+            counts = unread_counts(self.user, task_ids)
+        self.assertEqual(counts, {self.tasks[0].id: 1, self.tasks[1].id: 1})
+        self.assertEqual(unread_counts(self.user2, task_ids), {self.tasks[0].id: 1})
+
+    def test_detail_view_marks_read(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.client.get(reverse("task_detail", args=[self.tasks[0].id]))
+        self.client.get(reverse("task_detail", args=[self.tasks[0].id]))
+        self.assertEqual(
+            unread_counts(self.user, [task.id for task in self.tasks]),
+            {self.tasks[1].id: 1},
+        )
+        Comment.objects.create(
+            content="Again", task=self.tasks[0], commented_by=self.user2
+        )
+        self.assertEqual(
+            unread_counts(self.user, [self.tasks[0].id]), {self.tasks[0].id: 1}
+        )
+
+    def test_late_commits_stay_unread(self):
+        # a comment whose id was handed out before the task was read, but
+        # which committed after it
+        slow = Comment.objects.create(
+            content="Slow", task=self.tasks[1], commented_by=self.user2
+        )
+        slow_id = slow.id
+        slow.delete()
+        Comment.objects.create(
+            content="Fast", task=self.tasks[1], commented_by=self.user2
+        )
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.client.get(reverse("task_detail", args=[self.tasks[1].id]))
+        self.assertEqual(unread_counts(self.user, [self.tasks[1].id]), {})
+        Comment.objects.create(
+            id=slow_id, content="Slow", task=self.tasks[1], commented_by=self.user2
+        )
+        self.assertEqual(
+            unread_counts(self.user, [self.tasks[1].id]), {self.tasks[1].id: 1}
+        )
+
+    def test_badges(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        response = self.client.get(reverse("home"))
+        unread = {task.id: task.unread_comments for task in response.context["tasks"]}
+        self.assertEqual(
+            unread, {self.tasks[0].id: 1, self.tasks[1].id: 1, self.tasks[2].id: 0}
+        )
+        self.assertContains(response, 'title="Unread comments"', count=2)
+
+        self.client.login(email="testuser2@gmail.com", password="1234")
+        response = self.client.get(reverse("my_task"))
+        self.assertEqual(response.context["current_task"].unread_comments, 1)
+        self.assertEqual(
+            [task.unread_comments for task in response.context["incomplete_task"]],
+            [0, 0],
+        )
+
+
+class TestTaskRows(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.user2 = User.objects.create_user(
+            email="testuser2@gmail.com", password="1234"
+        )
+        for index in range(5):
+            Task.objects.create(
+                title=f"Task {index}",
+                description="x" * 100,
+                assigned_to=self.user2,
+                assigned_by=self.user,
+                due_date="2024-12-24",
+                priority=PRIORITY_HIGH,
+            )
+
+    def test_rows(self):
+        with self.assertNumQueries(2):
+            rows = task_rows(Task.objects.order_by("id"))
+        self.assertEqual([str(row) for row in rows], [f"Task {i}" for i in range(5)])
+        self.assertEqual(rows[0].assigned_to, "testuser2@gmail.com")
+        self.assertEqual(rows[0].assigned_by, "testuser@gmail.com")
+        self.assertEqual(rows[0].get_priority_display(), "High")
+        self.assertFalse(hasattr(rows[0], "__dict__"))
+        self.assertFalse(hasattr(rows[0], "description"))
+
+    def test_list_views_render_rows(self):
+        self.client.login(email="testuser@gmail.com", password="12345")
+        # no query per row for the assignee names
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("home"))
+        self.assertIsInstance(response.context["tasks"].object_list[0], TaskRow)
+        self.assertContains(response, "testuser2@gmail.com", count=5)
+
+    def test_benchmark(self):
+        queryset = Task.objects.order_by("id")
+        models = measure_task_rows(load_models, queryset, repeat=1)
+        rows = measure_task_rows(task_rows, queryset, repeat=1)
+        self.assertEqual(models["count"], rows["count"])
+        self.assertLess(rows["retained"], models["retained"])
+
+
+class TestProductionServer(TestCase):
+    # the readiness check queries every configured database
+    databases = "__all__"
+
+    def load_config(self, **env):
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+
+    def test_thread_workers(self):
+        conf = self.load_config(SERVER_WORKER_MODE="thread")
+        self.assertEqual(conf["worker_class"], "gthread")
+        self.assertEqual(conf["wsgi_app"], "taskproject.wsgi:application")
+        self.assertEqual(conf["workers"], conf["cpu_count"]() * 2 + 1)
+        self.assertTrue(conf["preload_app"])
+        self.assertGreater(conf["max_requests"], 0)
+
+    def test_async_workers(self):
+        conf = self.load_config(SERVER_WORKER_MODE="async", SERVER_WORKERS="3")
+        self.assertEqual(conf["worker_class"], "uvicorn_worker.UvicornWorker")
+        self.assertEqual(conf["wsgi_app"], "taskproject.asgi:application")
+        self.assertEqual(conf["workers"], 3)
+        self.assertEqual(conf["default_workers"]("async", 4), 4)
+
+    def test_worker_packages_are_required(self):
+        requirements = (settings.BASE_DIR / "requirements.txt").read_text()
+        packages = {line.partition("==")[0].lower() for line in requirements.split()}
+        for worker_class in self.load_config()["WORKER_CLASSES"].values():
+            module, _, _ = worker_class.rpartition(".")
+            if module:
+                self.assertIn(module.replace("_", "-"), packages)
+
+    @skipUnless(find_spec("uvicorn_worker"), "uvicorn-worker is not installed")
+    def test_async_worker_class_imports(self):
+        from gunicorn.util import load_class
+        from gunicorn.workers.base import Worker
+
+        worker_class = load_class(
+            self.load_config(SERVER_WORKER_MODE="async")["worker_class"]
+        )
+        self.assertTrue(issubclass(worker_class, Worker))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.load_config(SERVER_WORKER_MODE="fork")
+
+    def test_ready(self):
+        response = self.client.get(reverse("readiness"))
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()["checks"]
+        self.assertEqual(checks["database:default"], "ok")
+        self.assertEqual(checks["cache"], "ok")
+        self.assertIn("no-store", response["Cache-Control"])
+
+    def test_cache_down(self):
+        with mock.patch("taskapp.views.cache.get", return_value=None):
+            response = self.client.get(reverse("readiness"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["checks"]["cache"], "unavailable")
+
+    def test_database_down(self):
+        with mock.patch(
+            "django.db.backends.utils.CursorWrapper.execute",
+            side_effect=DatabaseError("down"),
+        ):
+            response = self.client.get(reverse("readiness"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response.json()["checks"]["database:default"], "unavailable"
+        )
+
+
+class TestAttachments(TestCase):
+    def setUp(self):
+        # the rate limits count uploads of earlier tests too
+        cache.clear()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        overrides = override_settings(ATTACHMENT_ROOT=self.root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        self.task = Task.objects.create(
+            title="Spec",
+            description="attachment task",
+            assigned_to=self.user,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+        )
+        self.client.login(email="testuser@gmail.com", password="12345")
+        self.content = b"0123456789" * 10
+
+    def upload(self, content=None, name="spec.txt", **data):
+        return self.client.post(
+            reverse("upload_attachment", args=[self.task.id]),
+            {"file": SimpleUploadedFile(name, content or self.content), **data},
+        )
+
+    def download(self, **headers):
+        attachment = Attachment.objects.get()
+        return self.client.get(
+            reverse("download_attachment", args=[attachment.id]), headers=headers
+        )
+
+    def stored_files(self):
+        return [
+            os.path.join(path, name)
+            for path, _, names in os.walk(self.root)
+            for name in names
+        ]
+
+    def test_upload_is_hashed_and_deduplicated(self):
+        self.upload()
+        self.upload(name="copy.txt")
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(
+            list(Attachment.objects.values_list("name", "size", "sha256")),
+            [("spec.txt", 100, digest), ("copy.txt", 100, digest)],
+        )
+        self.assertEqual(
+            self.stored_files(),
+            [os.path.join(self.root, "default", digest[:2], digest[2:])],
+        )
+
+    def test_upload_needs_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.login(email="testuser@gmail.com", password="12345")
+        response = client.post(
+            reverse("upload_attachment", args=[self.task.id]),
+            {"file": SimpleUploadedFile("spec.txt", self.content)},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_upload_with_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.login(email="testuser@gmail.com", password="12345")
+        # the task page sets the csrf cookie for its upload form
+        client.get(reverse("task_detail", args=[self.task.id]))
+        response = client.post(
+            reverse("upload_attachment", args=[self.task.id]),
+            {
+                "file": SimpleUploadedFile("spec.txt", self.content),
+                "csrfmiddlewaretoken": client.cookies["csrftoken"].value,
+            },
+        )
+        self.assertRedirects(response, reverse("task_detail", args=[self.task.id]))
+        self.assertEqual(Attachment.objects.get().name, "spec.txt")
+
+    @override_settings(ATTACHMENT_MAX_SIZE=50)
+    def test_too_large(self):
+        self.upload()
+        self.assertFalse(Attachment.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_comment_attachment(self):
+        comment = Comment.objects.create(
+            content="see file", task=self.task, commented_by=self.user
+        )
+        self.upload(comment=comment.id)
+        response = self.client.get(reverse("task_detail", args=[self.task.id]))
+        self.assertEqual(response.context["attachments"], [])
+        self.assertEqual(
+            [file.name for file in response.context["comments"][0].files],
+            ["spec.txt"],
+        )
+
+    def test_comment_id_is_validated(self):
+        response = self.upload(comment="not-an-id")
+        self.assertEqual(
+            [str(message) for message in get_messages(response.wsgi_request)],
+            ["That comment does not belong to this task"],
+        )
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_row_is_created_before_the_file_is_stored(self):
+        def store(workspace_id, uploaded):
+            # a cleanup running now already sees the attachment
+            self.assertTrue(Attachment.objects.filter(sha256=uploaded.sha256).exists())
+            raise OSError("disk full")
+
+        with mock.patch("taskapp.attachments.store", side_effect=store):
+            with self.assertRaises(OSError):
+                self.upload()
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_upload_during_cleanup_keeps_the_file(self):
+        self.upload()
+        digest = Attachment.objects.get().sha256
+        # the upload's row shows up between the two checks of the cleanup
+        with mock.patch("taskapp.attachments.in_use", side_effect=[False, True]):
+            delete_blob("default", None, digest)
+        response = self.download()
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        response.close()
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_download(self):
+        self.upload()
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("attachment", response["Content-Disposition"])
+        response.close()
+
+        response = self.download(if_none_match=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_download(self):
+        self.upload()
+        response = self.download(range="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/100")
+        self.assertEqual(response["Content-Length"], "4")
+        response.close()
+
+        response = self.download(range="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+        response.close()
+        response = self.download(range="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+        # the file changed since the client got its first part
+        response = self.download(range="bytes=2-5", if_range='"other"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-", 10), (0, 9))
+        self.assertEqual(parse_range("bytes=5-50", 10), (5, 9))
+        self.assertEqual(parse_range("bytes=-50", 10), (0, 9))
+        self.assertIsNone(parse_range("bytes=0-1,4-5", 10))
+        self.assertIsNone(parse_range("bytes=5-3", 10))
+        self.assertIsNone(parse_range("items=0-1", 10))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=10-", 10)
+        with self.assertRaises(ValueError):
+            parse_range("bytes=-0", 10)
+
+    def test_purge_removes_unused_files(self):
+        self.upload()
+        self.task.soft_delete()
+        Task.all_objects.filter(id=self.task.id).update(
+            deleted_at=timezone.now() - timedelta(days=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("purge_deleted_tasks", stdout=StringIO())
+        self.assertFalse(Attachment.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    """
+    A stand-in webhook endpoint recording what it receives, answering with
+    the status queued in server.statuses or 204 """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append(
+            {"headers": self.headers, "body": body, "client": self.client_address}
+        )
+        status = self.server.statuses.pop(0) if self.server.statuses else 204
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(TASK_EVENT_SETTLE_SECONDS=0)
+class TestWebhooks(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookReceiver)
+        self.server.received = []
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.pool = ConnectionPool(timeout=5)
+        self.addCleanup(self.pool.close)
+
+        self.user = User.objects.create_user(
+            email="testuser@gmail.com", password="12345"
+        )
+        host, port = self.server.server_address
+        self.endpoint = WebhookEndpoint.objects.create(url=f"http://{host}:{port}/hook")
+
+    def create_task(self, title="Webhook task"):
+        return Task.objects.create(
+            title=title,
+            description="webhook task",
+            assigned_to=self.user,
+            assigned_by=self.user,
+            due_date="2024-12-24",
+        )
+
+    def test_signed_batch(self):
+        task = self.create_task()
+        Comment.objects.create(content="hi", task=task, commented_by=self.user)
+        self.assertEqual(deliver_due(self.pool), 2)
+
+        [request] = self.server.received
+        headers = request["headers"]
+        signature = sign(
+            self.endpoint.secret, headers["X-Webhook-Timestamp"], request["body"]
+        )
+        self.assertEqual(headers["X-Webhook-Signature"], f"sha256={signature}")
+        events = json.loads(request["body"])["events"]
+        self.assertEqual(
+            [(event["model"], event["action"]) for event in events],
+            [("task", "created"), ("comment", "created")],
+        )
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.last_event_id, events[-1]["seq"])
+        # nothing left to send
+        self.assertEqual(deliver_due(self.pool), 0)
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_batches_share_a_connection(self):
+        for index in range(5):
+            self.create_task(f"Task {index}")
+        self.assertEqual(deliver_due(self.pool, batch_size=2), 5)
+        self.assertEqual(len(self.server.received), 3)
+        clients = {request["client"] for request in self.server.received}
+        self.assertEqual(len(clients), 1)
+
+    def test_retry_with_backoff(self):
+        self.create_task()
+        self.server.statuses = [500]
+        self.assertEqual(deliver_due(self.pool), 0)
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.failures, 1)
+        self.assertEqual(self.endpoint.last_error, "HTTP 500")
+        self.assertGreater(self.endpoint.next_attempt_at, timezone.now())
+        # not due yet
+        self.assertEqual(deliver_due(self.pool), 0)
+        self.assertEqual(len(self.server.received), 1)
+
+        WebhookEndpoint.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_due(self.pool), 1)
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.failures, 0)
+        self.assertIsNone(self.endpoint.next_attempt_at)
+        # the retried batch is the same batch
+        self.assertEqual(
+            self.server.received[0]["headers"]["X-Webhook-Id"],
+            self.server.received[1]["headers"]["X-Webhook-Id"],
+        )
+
+    def test_unreachable(self):
+        WebhookEndpoint.objects.update(url="http://127.0.0.1:9/hook")
+        self.create_task()
+        self.assertEqual(deliver_due(self.pool), 0)
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.failures, 1)
+        self.assertIn("ConnectionRefusedError", self.endpoint.last_error)
+
+    def test_backoff_grows(self):
+        with self.settings(WEBHOOK_BACKOFF=10, WEBHOOK_MAX_BACKOFF=100):
+            self.assertTrue(5 <= backoff(1) <= 10)
+            self.assertTrue(20 <= backoff(3) <= 40)
+            self.assertTrue(50 <= backoff(30) <= 100)
+
+    def test_scoped_to_workspace_and_event_types(self):
+        workspace = Workspace.objects.create(name="Other", slug="other")
+        other = self.create_task()
+        other.workspace = workspace
+        other.save()
+        task = self.create_task()
+        task.status = "completed"
+        task.save()
+        WebhookEndpoint.objects.update(event_types=["task.updated"])
+        self.assertEqual(deliver_due(self.pool), 1)
+        events = json.loads(self.server.received[0]["body"])["events"]
+        self.assertEqual(events[0]["data"]["status"], "completed")
+
+    def test_starts_at_the_latest_event(self):
+        self.create_task()
+        host, port = self.server.server_address
+        WebhookEndpoint.objects.create(url=f"http://{host}:{port}/late")
+        self.assertEqual(deliver_due(self.pool), 1)
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_waits_for_earlier_commits(self):
+        self.create_task()
+        with self.settings(TASK_EVENT_SETTLE_SECONDS=60):
+            self.assertEqual(deliver_due(self.pool), 0)
+            self.assertEqual(self.server.received, [])
+            TaskEvent.objects.update(created=timezone.now() - timedelta(minutes=2))
+            self.assertEqual(deliver_due(self.pool), 1)
+
+    def test_cursor_moves_past_unsubscribed_events(self):
+        WebhookEndpoint.objects.update(event_types=["comment.created"])
+        self.create_task()
+        self.assertEqual(deliver_due(self.pool), 0)
+        self.assertEqual(self.server.received, [])
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.last_event_id, TaskEvent.objects.get().id)
+
+    def test_lease_is_renewed_per_batch(self):
+        for index in range(3):
+            self.create_task(f"Task {index}")
+        leases = []
+
+        def post(pool, endpoint, events):
+            leases.append(WebhookEndpoint.objects.get().next_attempt_at)
+            return post_batch(pool, endpoint, events)
+
+        with mock.patch("taskapp.webhooks.post_batch", side_effect=post):
+            self.assertEqual(deliver_due(self.pool, batch_size=1), 3)
+        self.assertEqual(len(leases), 3)
+        self.assertEqual(leases, sorted(set(leases)))
+
+    def test_claim_reloads_the_endpoint(self):
+        self.create_task()
+
+        def claim_after_other_worker(endpoint, now):
+            # another worker delivered after the endpoint was read
+            WebhookEndpoint.objects.update(last_event_id=TaskEvent.objects.get().id)
+            return claim(endpoint, now)
+
+        with mock.patch(
+            "taskapp.webhooks.claim", side_effect=claim_after_other_worker
+        ):
+            self.assertEqual(deliver_due(self.pool), 0)
+        self.assertEqual(self.server.received, [])
+
+    def test_unexpected_errors_back_off(self):
+        self.create_task()
+        with mock.patch("taskapp.webhooks.post_batch", side_effect=ValueError("bad")):
+            with self.assertLogs("taskapp.webhooks", "ERROR"):
+                self.assertEqual(deliver_due(self.pool), 0)
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.failures, 1)
+        self.assertEqual(self.endpoint.last_error, "ValueError: bad")
+        self.assertGreater(self.endpoint.next_attempt_at, timezone.now())
+
+    def test_deactivated_after_failing_too_long(self):
+        self.create_task()
+        WebhookEndpoint.objects.update(
+            failures=10, failing_since=timezone.now() - timedelta(days=4)
+        )
+        self.server.statuses = [500]
+        deliver_due(self.pool)
+        self.endpoint.refresh_from_db()
+        self.assertFalse(self.endpoint.is_active)
+        self.assertTrue(self.endpoint.last_error.startswith("Deactivated"))
+        self.assertIsNone(self.endpoint.failing_since)
+
+    def test_compaction_only_keeps_the_endpoints_workspace(self):
+        workspace = Workspace.objects.create(name="Other", slug="other")
+        WebhookEndpoint.objects.update(workspace=workspace)
+        task = self.create_task()
+        task.title = "Renamed"
+        task.save()
+        TaskEvent.objects.update(created=timezone.now() - timedelta(days=30))
+        call_command("compact_task_events", stdout=StringIO())
+        self.assertEqual(TaskEvent.objects.count(), 1)
+
+    def test_compaction_keeps_undelivered_events(self):
+        task = self.create_task()
+        task.title = "Renamed"
+        task.save()
+        TaskEvent.objects.update(created=timezone.now() - timedelta(days=30))
+        call_command("compact_task_events", stdout=StringIO())
+        self.assertEqual(TaskEvent.objects.count(), 2)
+        deliver_due(self.pool)
+        call_command("compact_task_events", stdout=StringIO())
+        self.assertEqual(TaskEvent.objects.count(), 1)
@@ -0,0 +1,54 @@
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import Comment, TaskReadMarker
+
+
+def mark_read(user, task, comments):
+    """
+    Loads comments, the comments of task shown to user, and records that user
+    has read them. Returns them as a list """
+    # taken before loading, a comment committed in between stays unread
+    read_at = timezone.now()
+    comments = list(comments)
+    if not comments:
+        return comments
+    # one upsert, a page view of a read task writes the same row again
+    TaskReadMarker.objects.bulk_create(
+        [TaskReadMarker(user=user, task=task, read_at=read_at)],
+        update_conflicts=True,
+        unique_fields=["user", "task"],
+        update_fields=["read_at"],
+    )
+    return comments
+
+
+def unread_counts(user, task_ids):
+    """
+    Maps the ids in task_ids to the number of comments by other users that user
+    has not read yet, tasks without any are left out. One grouped query for
+    all of them """
+    if not task_ids:
+        return {}
+    read = TaskReadMarker.objects.filter(
+        user=user, task_id=OuterRef("task_id"), read_at__gte=OuterRef("created")
+    )
+    rows = (
+        Comment.objects.filter(task_id__in=task_ids)
+        .exclude(commented_by=user)
+        .filter(~Exists(read))
+        .order_by()
+        .values("task_id")
+        .annotate(unread=Count("id"))
+    )
+    return {row["task_id"]: row["unread"] for row in rows}
+
+
+def annotate_unread(user, tasks):
+    """
+    Sets unread_comments on every task in tasks and returns them as a list """
+    tasks = list(tasks)
+    counts = unread_counts(user, [task.id for task in tasks])
+    for task in tasks:
+        task.unread_comments = counts.get(task.id, 0)
+    return tasks
@@ -1,31 +1,75 @@
 from django.urls import path
 
-from .views import (
-    AllTaskView,
-    LoginView,
-    LogoutView,
-    MyTaskView,
-    RegistrationView,
-    SearchView,
-    TaskCreateView,
-    TaskDeleteView,
-    TaskDetailView,
-    TaskEditView,
-    TaskListView,
-    UpdateMyTaskView,
-)
+from .lazy import lazy_view
 
+# views are imported on their first request, see taskapp.warmup to load them
+# before serving traffic
 urlpatterns = [
-    path("", TaskListView.as_view(), name="home"),
-    path("register/", RegistrationView.as_view(), name="register"),
-    path("login/", LoginView.as_view(), name="login"),
-    path("logout/", LogoutView.as_view(), name="logout"),
-    path("create/", TaskCreateView.as_view(), name="create_task"),
-    path("edit/<int:task_id>/", TaskEditView.as_view(), name="edit_task"),
-    path("delete/<int:task_id>/", TaskDeleteView.as_view(), name="delete_task"),
-    path("mytask/", MyTaskView.as_view(), name="my_task"),
-    path("update-task/<int:task_id>", UpdateMyTaskView.as_view(), name="update_mytask"),
-    path("detail/<int:task_id>", TaskDetailView.as_view(), name="task_detail"),
-    path("search/", SearchView.as_view(), name="search"),
-    path("tasks", AllTaskView.as_view(), name="all_task"),
+    path("", lazy_view("taskapp.views.TaskListView"), name="home"),
+    path("register/", lazy_view("taskapp.views.RegistrationView"), name="register"),
+    path("login/", lazy_view("taskapp.views.LoginView"), name="login"),
+    path("logout/", lazy_view("taskapp.views.LogoutView"), name="logout"),
+    path("create/", lazy_view("taskapp.views.TaskCreateView"), name="create_task"),
+    path(
+        "edit/<int:task_id>/",
+        lazy_view("taskapp.views.TaskEditView"),
+        name="edit_task",
+    ),
+    path(
+        "delete/<int:task_id>/",
+        lazy_view("taskapp.views.TaskDeleteView"),
+        name="delete_task",
+    ),
+    path(
+        "restore/<int:task_id>/",
+        lazy_view("taskapp.views.TaskRestoreView"),
+        name="restore_task",
+    ),
+    path("mytask/", lazy_view("taskapp.views.MyTaskView"), name="my_task"),
+    path(
+        "update-task/<int:task_id>",
+        lazy_view("taskapp.views.UpdateMyTaskView"),
+        name="update_mytask",
+    ),
+    path(
+        "update-tasks/",
+        lazy_view("taskapp.views.BulkUpdateMyTaskView"),
+        name="bulk_update_mytask",
+    ),
+    path(
+        "detail/<int:task_id>",
+        lazy_view("taskapp.views.TaskDetailView"),
+        name="task_detail",
+    ),
+    path(
+        "detail/<int:task_id>/attachments/",
+        lazy_view("taskapp.views.AttachmentUploadView"),
+        name="upload_attachment",
+    ),
+    path(
+        "attachments/<int:attachment_id>/",
+        lazy_view("taskapp.views.AttachmentDownloadView"),
+        name="download_attachment",
+    ),
+    path("search/", lazy_view("taskapp.views.SearchView"), name="search"),
+    path(
+        "search/suggest/",
+        lazy_view("taskapp.views.SearchSuggestView"),
+        name="search_suggest",
+    ),
+    path("tasks", lazy_view("taskapp.views.AllTaskView"), name="all_task"),
+    path("sync/", lazy_view("taskapp.views.SyncView"), name="sync"),
+    path("ready/", lazy_view("taskapp.views.ReadyQueueView"), name="ready_queue"),
+    path("health/ready/", lazy_view("taskapp.views.ReadinessView"), name="readiness"),
+    path(
+        "calendar/<str:token>.ics",
+        lazy_view("taskapp.views.CalendarFeedView"),
+        name="calendar_feed",
+    ),
+    path(
+        "calendar/reset/",
+        lazy_view("taskapp.views.CalendarTokenResetView"),
+        name="reset_calendar_token",
+    ),
+    path("dashboard/", lazy_view("taskapp.views.DashboardView"), name="dashboard"),
 ]
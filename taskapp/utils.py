@@ -1,12 +1,20 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, send_mail
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from .models import PRIORITY_RANKS, STATUS_CHOICES, User
+
+TASK_SORT_KEYS = ("priority", "due_date", "status")
+# matched by the task_*_priority_* indexes on Task
+TASK_SORT_DEFAULT = ("-priority", "due_date")
 
 
 def send_task_email(task):
     assignee = task.assigned_by
     subject = f"New Task Assigned: {task.title}"
     message = (
-        f"You have been assigned a new task: {task.title} with {task.priority} priority"
+        f"You have been assigned a new task: {task.title} with {task.get_priority_display()} priority"
         f"The task should be submitted by {task.due_date}"
 
     )
@@ -25,3 +33,85 @@ def task_update_email(task):
     email_from = settings.EMAIL_HOST_USER
     recipient_list = [task.assigned_by.email]
     send_mail(subject, message, email_from, recipient_list)
+
+
+def task_updates_email(assigner, tasks, connection=None):
+    """
+    One message telling assigner about the status of several of their tasks """
+    subject = f"Task Status Update: {len(tasks)} task(s)"
+    message = "\n".join(f"The task {task} is {task.status}" for task in tasks)
+    return EmailMessage(
+        subject,
+        message,
+        settings.EMAIL_HOST_USER,
+        [assigner.email],
+        connection=connection,
+    )
+
+
+def reminder_email(task, kind, connection=None):
+    if kind == "overdue":
+        subject = f"Task Overdue: {task.title}"
+        message = f"The task {task.title} was due on {task.due_date} and is not completed yet"
+    else:
+        subject = f"Task Due Soon: {task.title}"
+        message = f"The task {task.title} is due on {task.due_date}"
+    return EmailMessage(
+        subject,
+        message,
+        settings.EMAIL_HOST_USER,
+        [task.assigned_to.email],
+        connection=connection,
+    )
+
+
+def search_tasks(queryset, keyword):
+    # users are prefetched rather than joined because the tasks of a workspace
+    # may be stored on another database than the users
+    tasks = queryset.prefetch_related("assigned_to", "assigned_by")
+    task_by_status = tasks.filter(Q(status__icontains=keyword))
+    if task_by_status.exists():
+        return task_by_status
+    assigners = list(
+        User.objects.filter(first_name__icontains=keyword).values_list("id", flat=True)
+    )
+    task_by_assignee = tasks.filter(assigned_by__in=assigners)
+    if task_by_assignee.exists():
+        return task_by_assignee
+    return tasks.filter(due_date__icontains=keyword)
+
+
+def parse_task_sort(value):
+    """
+    Turns a sort parameter like "-priority,due_date" into an ordering, unknown
+    and repeated keys are dropped """
+    ordering = []
+    seen = set()
+    for key in (value or "").split(","):
+        key = key.strip()
+        field = key.removeprefix("-")
+        if field in TASK_SORT_KEYS and field not in seen:
+            ordering.append(key)
+            seen.add(field)
+    return ordering or list(TASK_SORT_DEFAULT)
+
+
+def filter_tasks(queryset, params):
+    """
+    Applies the priority, status, due_after and due_before query parameters,
+    invalid values are ignored """
+    priority = PRIORITY_RANKS.get(params.get("priority", ""))
+    if priority:
+        queryset = queryset.filter(priority=priority)
+    status = params.get("status", "")
+    if status in dict(STATUS_CHOICES):
+        queryset = queryset.filter(status=status)
+    ranges = (("due_after", "due_date__gte"), ("due_before", "due_date__lte"))
+    for param, lookup in ranges:
+        try:
+            due_date = parse_date(params.get(param, ""))
+        except ValueError:
+            due_date = None
+        if due_date:
+            queryset = queryset.filter(**{lookup: due_date})
+    return queryset
@@ -1,13 +1,98 @@
+import json
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Q, Sum
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
+from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
 from django.views import View
-
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition
+
+from .attachments import (
+    HashingUploadHandler,
+    RangeFile,
+    blob_name,
+    create_attachment,
+    parse_range,
+    storage,
+)
+from .bulk import bulk_update_status
+from .dependencies import (
+    previous_task,
+    ready_tasks,
+    set_dependencies,
+    update_dependents,
+)
 from .forms import CommentForm, MyTaskForm, RegistrationForm, TaskForm
-from .models import Comment, Task, User
-from .utils import send_task_email, task_update_email
+from .ical import calendar_feed, calendar_version
+from .models import (
+    ArchivedComment,
+    ArchivedTask,
+    Attachment,
+    Comment,
+    DailyTaskStats,
+    DueDateStats,
+    Task,
+    TaskEvent,
+    User,
+    UserTaskStats,
+)
+from .paginator import KeysetPaginator
+from .ratelimit import RateLimitMixin
+from .routers import active_workspace
+from .rows import task_rows
+from .search import cached_search, suggest
+from .signals import settled
+from .stats import record_task_change, snapshot
+from .unread import annotate_unread, mark_read
+from .utils import (
+    filter_tasks,
+    parse_task_sort,
+    send_task_email,
+    task_update_email,
+)
+from .webhooks import event_json
+
+
+class TaskListMixin:
+    """
+    Sorting, filtering and keyset pagination of task lists from the sort,
+    priority, status, due_after, due_before and cursor query parameters """
+
+    page_size = 50
+
+    def paginate_tasks(self, request, queryset):
+        ordering = parse_task_sort(request.GET.get("sort"))
+        # the pages are rendered from TaskRow projections, not model instances
+        paginator = KeysetPaginator(
+            filter_tasks(queryset, request.GET),
+            ordering,
+            self.page_size,
+            load=task_rows,
+        )
+        try:
+            page = paginator.page(request.GET.get("cursor"))
+        except ValueError:
+            page = paginator.page()
+        next_url = None
+        if page.has_next():
+            query = request.GET.copy()
+            query["cursor"] = page.next_cursor
+            next_url = f"?{query.urlencode()}"
+        return page, {"sort": ",".join(ordering), "next_url": next_url}
 
 
 class RegistrationView(View):
@@ -36,11 +121,13 @@ class RegistrationView(View):
         return render(request, self.template_name, {"form": form})
 
 
-class LoginView(View):
+class LoginView(RateLimitMixin, View):
     """
     A view for handling user Login. It handles both GET and POST request """
 
     template_name = "login.html"
+    rate_limit_scope = "login"
+    rate_limit_username_field = "email"
 
     def get(self, request):
         if request.user.is_authenticated:
@@ -73,7 +160,7 @@ class LogoutView(LoginRequiredMixin, View):
         return redirect("home")
 
 
-class TaskListView(LoginRequiredMixin, View):
+class TaskListView(LoginRequiredMixin, TaskListMixin, View):
     """
     A view for rendering all the task that is assigned by the authenticated user """
 
@@ -81,34 +168,54 @@ class TaskListView(LoginRequiredMixin, View):
     template_name = "index.html"
 
     def get(self, request):
-        tasks = Task.objects.filter(assigned_by=request.user)
-        context = {"tasks": tasks}
+        tasks, context = self.paginate_tasks(
+            request, Task.objects.filter(assigned_by=request.user)
+        )
+        undo_since = timezone.now() - timedelta(seconds=settings.TASK_UNDO_SECONDS)
+        deleted_tasks = Task.all_objects.filter(
+            assigned_by=request.user, deleted_at__gte=undo_since
+        )
+        annotate_unread(request.user, tasks)
+        context.update({"tasks": tasks, "deleted_tasks": deleted_tasks})
         return render(request, self.template_name, context)
 
 
-class TaskCreateView(LoginRequiredMixin, View):
+class TaskCreateView(LoginRequiredMixin, RateLimitMixin, View):
     """
     A view for creating a new task """
 
     template_name = "create_task.html"
     login_url = "/login/"
+    rate_limit_scope = "create_task"
 
     def get(self, request):
-        form = TaskForm()
+        form = TaskForm(workspace=request.workspace)
         return render(request, self.template_name, {"form": form})
 
     def post(self, request):
-        form = TaskForm(request.POST)
+        form = TaskForm(request.POST, workspace=request.workspace)
         assigned_to = request.POST.get("assigned_to")
 
         if form.is_valid():
             task = form.save(commit=False)
+            task.workspace = request.workspace
             task.assigned_by = request.user
-            task.assigned_to = User.objects.filter(id=assigned_to).first()
-            task.save()
-            send_task_email(task)
-            messages.success(request, "Task created sucessfully")
-            return redirect("home")
+            task.assigned_to = User.objects.filter(
+                id=assigned_to, workspace=request.workspace
+            ).first()
+            # the task's events are on default, the task maybe elsewhere
+            db = router.db_for_write(Task)
+            try:
+                with transaction.atomic(using=db), transaction.atomic():
+                    task.save()
+                    set_dependencies(task, form.cleaned_data["depends_on"])
+            except ValidationError as error:
+                form.add_error("depends_on", error)
+            else:
+                record_task_change(None, snapshot(task), created=True)
+                send_task_email(task)
+                messages.success(request, "Task created sucessfully")
+                return redirect("home")
         messages.error(request, "Try again")
         return render(request, self.template_name, {"form": form})
 
@@ -124,7 +231,7 @@ class TaskEditView(LoginRequiredMixin, View):
         task = Task.objects.filter(id=task_id).first()
         if task:
             if task.assigned_by == request.user:
-                form = TaskForm(instance=task)
+                form = TaskForm(instance=task, workspace=request.workspace)
                 return render(request, self.template_name, {"form": form})
             messages.error(request, "You dont have access to edit this task")
             return redirect("home")
@@ -135,17 +242,28 @@ class TaskEditView(LoginRequiredMixin, View):
 
     def post(self, request, task_id):
         task = Task.objects.filter(id=task_id).first()
-        form = TaskForm(request.POST, instance=task)
+        before = snapshot(task)
+        form = TaskForm(request.POST, instance=task, workspace=request.workspace)
         if form.is_valid():
-            form.save()
-            return redirect("home")
+            # the task's events are on default, the task maybe elsewhere
+            db = router.db_for_write(Task)
+            try:
+                with transaction.atomic(using=db), transaction.atomic():
+                    task = form.save()
+                    set_dependencies(task, form.cleaned_data["depends_on"])
+            except ValidationError as error:
+                form.add_error("depends_on", error)
+            else:
+                record_task_change(before, snapshot(task))
+                return redirect("home")
         messages.error(request, "Try again")
         return render(request, self.template_name, {"form": form})
 
 
 class TaskDeleteView(LoginRequiredMixin, View):
     """
-    A view for deleting task """
+    A view for deleting task. The task is only marked as deleted so it can be
+    restored for a while, the purge_deleted_tasks command removes it later """
 
     template_name = "index.html"
     login_url = "/login/"
@@ -154,48 +272,83 @@ class TaskDeleteView(LoginRequiredMixin, View):
         task = Task.objects.filter(id=task_id).first()
         if task:
             if task.assigned_by == request.user:
-                task.delete()
+                before = snapshot(task)
+                task.soft_delete()
+                record_task_change(before, None)
+                update_dependents(task, before, None)
                 messages.success(request, "Task deleted successfully")
-            messages.error(request, "You dont have access to delete this task")
+            else:
+                messages.error(request, "You dont have access to delete this task")
             return redirect("home")
         else:
             messages.error(request, "item does not exist")
         return redirect("home")
 
 
-class MyTaskView(LoginRequiredMixin, View):
+class TaskRestoreView(LoginRequiredMixin, View):
+    """
+    A view for restoring a task deleted within the undo window """
+
+    login_url = "/login/"
+
+    def post(self, request, task_id):
+        undo_since = timezone.now() - timedelta(seconds=settings.TASK_UNDO_SECONDS)
+        task = Task.all_objects.filter(
+            id=task_id, assigned_by=request.user, deleted_at__gte=undo_since
+        ).first()
+        if task:
+            task.restore()
+            record_task_change(None, snapshot(task))
+            update_dependents(task, None, snapshot(task))
+            messages.success(request, "Task restored successfully")
+        else:
+            messages.error(request, "This task can no longer be restored")
+        return redirect("home")
+
+
+class MyTaskView(LoginRequiredMixin, TaskListMixin, View):
     """
-    A view that renders the task that are assigned to the requested user """
+    A view that renders the task that are assigned to the requested user. The
+    sort and filter parameters apply to both lists, upcoming tasks default to
+    assignment order. The completed tasks are paginated """
 
     login_url = "/login/"
     template_name = "my_task.html"
 
     def get(self, request):
-        completed_task = (
-            Task.objects.filter(assigned_to=request.user)
-            .filter(complete=True)
-            .order_by("id")
+        completed_task, context = self.paginate_tasks(
+            request, Task.objects.filter(assigned_to=request.user, complete=True)
         )
-        current_task = Task.objects.filter(
+        # tasks have to be completed in the order they were assigned
+        open_tasks = Task.objects.filter(
             Q(assigned_to=request.user) & Q(complete=False)
-        ).first()
+        )
+        current_task = next(iter(task_rows(open_tasks.order_by("id")[:1])), None)
+        incomplete_task = filter_tasks(open_tasks, request.GET)
         if current_task:
-            incomplete_task = (
-                Task.objects.filter(
-                    Q(assigned_to=request.user) & Q(complete=False)
-                )
-                .exclude(id=current_task.id)
-                .order_by("id")
-            )
-        else:
-            incomplete_task = Task.objects.filter(
-                Q(assigned_to=request.user) & Q(complete=False)
-            ).order_by("id")
-        context = {
-            "completed_task": completed_task,
-            "incomplete_task": incomplete_task,
-            "current_task": current_task,
-        }
+            incomplete_task = incomplete_task.exclude(id=current_task.id)
+        # without a sort parameter upcoming tasks are listed in assignment order
+        sort = request.GET.get("sort")
+        ordering = parse_task_sort(sort) if sort else []
+        incomplete_task = task_rows(incomplete_task.order_by(*ordering, "id"))
+        # one unread count query for all three lists
+        annotate_unread(
+            request.user,
+            [*completed_task, *incomplete_task, *filter(None, [current_task])],
+        )
+        calendar_token = request.user.get_calendar_token()
+        context.update(
+            {
+                "calendar_url": request.build_absolute_uri(
+                    reverse("calendar_feed", args=[calendar_token])
+                ),
+                "completed_task": completed_task,
+                "incomplete_task": incomplete_task,
+                "current_task": current_task,
+                "sort": ",".join(ordering),
+                "assignment_order": True,
+            }
+        )
         return render(request, self.template_name, context)
 
 
@@ -224,10 +377,14 @@ class UpdateMyTaskView(LoginRequiredMixin, View):
 
     def post(self, request, task_id):
         task = Task.objects.filter(id=task_id).first()
-        previous_task = Task.objects.filter(
-            Q(id__lt=task.id) & Q(assigned_to=request.user)
-        ).last()
-        if not previous_task or previous_task.complete:
+        if task and task.blocked:
+            messages.error(
+                request, "This task is waiting for the tasks it depends on"
+            )
+            return redirect("my_task")
+        previous = previous_task(task, request.user)
+        if not previous or previous.complete:
+            before = snapshot(task)
             form = MyTaskForm(request.POST, instance=task)
             if form.is_valid():
                 task.status = request.POST.get("status")
@@ -236,44 +393,127 @@ class UpdateMyTaskView(LoginRequiredMixin, View):
                 else:
                     task.complete = False
                 task.save()
+                record_task_change(before, snapshot(task))
+                update_dependents(task, before, snapshot(task))
                 task_update_email(task)
                 return redirect("my_task")
 
         messages.error(
             request,
-            f"You cannot update this task until the previous task '{previous_task.title}' is completed",
+            f"You cannot update this task until the previous task '{previous.title}' is completed",
         )
         return render(request, self.template_name)
 
 
-class TaskDetailView(LoginRequiredMixin, View):
+class BulkUpdateMyTaskView(LoginRequiredMixin, View):
+    """
+    A view where the requested user can change the status of several of the
+    tasks assigned to them at once. Takes task_ids and status as form data, or
+    as a JSON object to get a JSON response """
+
+    login_url = "/login/"
+
+    def post(self, request):
+        is_json = request.content_type == "application/json"
+        try:
+            if is_json:
+                data = json.loads(request.body)
+                task_ids = data.get("task_ids", [])
+                status = data.get("status", "")
+            else:
+                task_ids = request.POST.getlist("task_ids")
+                status = request.POST.get("status", "")
+            task_ids = [int(task_id) for task_id in task_ids]
+        except (ValueError, TypeError, AttributeError):
+            if is_json:
+                return JsonResponse({"errors": ["Invalid request"]}, status=400)
+            messages.error(request, "Invalid request")
+            return redirect("my_task")
+
+        tasks, errors = bulk_update_status(request.user, task_ids, status)
+        if is_json:
+            if errors:
+                return JsonResponse({"errors": errors}, status=400)
+            return JsonResponse({"updated": [task.id for task in tasks]})
+        for error in errors:
+            messages.error(request, error)
+        if tasks:
+            messages.success(request, f"Updated {len(tasks)} task(s)")
+        return redirect("my_task")
+
+
+class TaskDetailView(LoginRequiredMixin, RateLimitMixin, View):
     """
     A view that renders detailed information about the task """
 
     template_name = "task_detail.html"
     login_url = "/login/"
+    rate_limit_scope = "comment"
 
     def get(self, request, task_id):
-        task = Task.objects.filter(id=task_id).first()
+        task = Task.objects.filter(id=task_id, workspace=request.workspace).first()
         comments = Comment.objects.filter(task=task)
+        archived = False
+        if task is None:
+            # completed tasks moved away by the archive_tasks command
+            task = ArchivedTask.objects.filter(
+                id=task_id, workspace=request.workspace
+            ).first()
+            comments = ArchivedComment.objects.filter(task=task)
+            archived = task is not None
+        else:
+            comments = mark_read(request.user, task, comments)
+        comments, attachments = self.attach_files(task, comments)
         form = CommentForm()
-        context = {"task": task, "comments": comments, "form": form}
+        context = {
+            "task": task,
+            "comments": comments,
+            "attachments": attachments,
+            "form": form,
+            "archived": archived,
+        }
         return render(request, self.template_name, context)
 
     def post(self, request, task_id):
-        task = Task.objects.get(id=task_id)
+        task = Task.objects.filter(id=task_id, workspace=request.workspace).first()
+        if task is None:
+            messages.error(request, "You cannot comment on an archived task")
+            return redirect("task_detail", task_id=task_id)
         form = CommentForm(request.POST)
 
         if form.is_valid():
             content = form.save(commit=False)
             content.commented_by = request.user
             content.task = task
+            content.workspace_id = task.workspace_id
             content.save()
             return redirect("home")
-        comments = Comment.objects.filter(task=task)
-        context = {"task": task, "comments": comments, "form": form}
+        comments, attachments = self.attach_files(
+            task, Comment.objects.filter(task=task)
+        )
+        context = {
+            "task": task,
+            "comments": comments,
+            "attachments": attachments,
+            "form": form,
+        }
         return render(request, self.template_name, context)
 
+    @staticmethod
+    def attach_files(task, comments):
+        """
+        Returns the comments with their attachments set as files, and the
+        attachments of the task itself """
+        comments = list(comments)
+        if task is None:
+            return comments, []
+        by_comment = {}
+        for attachment in Attachment.objects.filter(task_id=task.id).order_by("id"):
+            by_comment.setdefault(attachment.comment_id, []).append(attachment)
+        for comment in comments:
+            comment.files = by_comment.get(comment.id, [])
+        return comments, by_comment.get(None, [])
+
 
 class SearchView(LoginRequiredMixin, View):
     """
@@ -284,27 +524,28 @@ class SearchView(LoginRequiredMixin, View):
 
     def get(self, request):
         keyword = request.GET.get("keyword", "")
+        tasks = []
 
         if keyword:
-            task_by_status = Task.objects.filter(Q(status__icontains=keyword))
-            if task_by_status.exists():
-                tasks = task_by_status
-            else:
-                task_by_assignee = Task.objects.filter(
-                    assigned_by__first_name__icontains=keyword
-                )
-
-                if task_by_assignee.exists():
-                    tasks = task_by_assignee
-
-                else:
-                    tasks = Task.objects.filter(due_date__icontains=keyword)
+            tasks = cached_search(request.workspace, keyword)
 
         context = {"tasks": tasks, "keyword": keyword}
         return render(request, self.template_name, context)
 
 
-class AllTaskView(LoginRequiredMixin, View):
+class SearchSuggestView(LoginRequiredMixin, View):
+    """
+    A view that returns the statuses and assigner names starting with the typed
+    prefix, for the type-ahead of the search box """
+
+    login_url = "/login/"
+
+    def get(self, request):
+        suggestions = suggest(request.workspace, request.GET.get("q", ""))
+        return JsonResponse({"suggestions": suggestions})
+
+
+class AllTaskView(LoginRequiredMixin, TaskListMixin, View):
     """
     A view that renders all the tasks """
 
@@ -312,5 +553,313 @@ class AllTaskView(LoginRequiredMixin, View):
     template_name = "all_task.html"
 
     def get(self, request):
-        tasks = Task.objects.all()
-        return render(request, self.template_name, {"tasks": tasks})
+        tasks, context = self.paginate_tasks(
+            request,
+            Task.objects.filter(workspace=request.workspace),
+        )
+        context["tasks"] = tasks
+        return render(request, self.template_name, context)
+
+
+class SyncView(LoginRequiredMixin, View):
+    """
+    A view that returns the task and comment changes visible to the user
+    that happened after the given sync token, oldest first """
+
+    login_url = "/login/"
+    max_batch_size = 500
+
+    def get(self, request):
+        try:
+            since = int(request.GET.get("since", 0))
+            limit = int(request.GET.get("limit", self.max_batch_size))
+        except ValueError:
+            return JsonResponse({"error": "Invalid sync token"}, status=400)
+        limit = max(1, min(limit, self.max_batch_size))
+
+        # stops before the first event that may still be joined by an
+        # earlier one, the client picks the rest up on its next call
+        events = settled(
+            TaskEvent.objects.filter(
+                Q(assigned_to=request.user) | Q(assigned_by=request.user),
+                id__gt=since,
+            ).order_by("id")[: limit + 1]
+        )
+        has_more = len(events) > limit
+        events = events[:limit]
+        return JsonResponse(
+            {
+                "events": [event_json(event) for event in events],
+                "next": str(events[-1].id if events else since),
+                "has_more": has_more,
+            }
+        )
+
+
+class ReadyQueueView(LoginRequiredMixin, View):
+    """
+    A view that returns the open tasks assigned to the user that can be
+    updated now, see taskapp.dependencies.ready_tasks, most urgent first """
+
+    login_url = "/login/"
+    max_batch_size = 100
+
+    def get(self, request):
+        try:
+            limit = int(request.GET.get("limit", self.max_batch_size))
+        except ValueError:
+            return JsonResponse({"error": "Invalid limit"}, status=400)
+        limit = max(1, min(limit, self.max_batch_size))
+
+        tasks = ready_tasks(Task.objects.filter(assigned_to=request.user)).order_by(
+            "-priority", "due_date", "id"
+        )[:limit]
+        return JsonResponse(
+            {
+                "tasks": [
+                    {
+                        "id": task.id,
+                        "title": task.title,
+                        "priority": task.get_priority_display(),
+                        "due_date": task.due_date,
+                        "status": task.status,
+                    }
+                    for task in tasks
+                ]
+            }
+        )
+
+
+def calendar_etag(request, token):
+    user = (
+        User.objects.filter(calendar_token=token)
+        .select_related("workspace")
+        .only("id", "workspace__db_alias")
+        .first()
+    )
+    request.calendar = (user, calendar_version(user.pk) if user else None)
+    return request.calendar[1]
+
+
+@method_decorator(condition(etag_func=calendar_etag), name="get")
+class CalendarFeedView(View):
+    """
+    A view that serves the due dates of a user's open tasks as an iCalendar
+    feed. Calendar apps cannot log in, the secret token in the URL identifies
+    the user. The ETag changes whenever one of the user's tasks does, so
+    polling clients mostly get a 304 """
+
+    def get(self, request, token):
+        user, version = request.calendar
+        if user is None:
+            raise Http404
+        # token auth skips WorkspaceMiddleware, the tasks may be on a shard
+        with active_workspace(user.workspace):
+            feed = calendar_feed(user, version)
+        response = HttpResponse(feed, content_type="text/calendar; charset=utf-8")
+        response["Content-Disposition"] = 'inline; filename="tasks.ics"'
+        # always revalidate, which the ETag makes cheap
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class CalendarTokenResetView(LoginRequiredMixin, View):
+    """
+    A view that replaces the calendar feed URL of the user, e.g. after it was
+    shared by mistake """
+
+    login_url = "/login/"
+
+    def post(self, request):
+        request.user.reset_calendar_token()
+        messages.success(request, "Your calendar link was changed")
+        return redirect("my_task")
+
+
+class DashboardView(LoginRequiredMixin, View):
+    """
+    A view that renders task throughput and workload statistics. It only reads
+    the aggregate tables maintained by taskapp.stats """
+
+    login_url = "/login/"
+    template_name = "dashboard.html"
+    days = 30
+    top_assignees = 10
+
+    def get(self, request):
+        today = timezone.localdate()
+        # None selects the shared default workspace
+        workspace = request.workspace
+        daily = list(
+            DailyTaskStats.objects.filter(
+                workspace=workspace, day__gt=today - timedelta(days=self.days)
+            ).order_by("day")
+        )
+        peak = max(
+            [max(d.created_count, d.completed_count) for d in daily], default=0
+        )
+        user_stats = UserTaskStats.objects.filter(workspace=workspace)
+        totals = user_stats.aggregate(
+            open=Sum("open_count"), completed=Sum("completed_count")
+        )
+        open_count = totals["open"] or 0
+        completed_count = totals["completed"] or 0
+        overdue = DueDateStats.objects.filter(
+            workspace=workspace, due_date__lt=today
+        ).aggregate(overdue=Sum("open_count"))
+        overdue_count = overdue["overdue"] or 0
+        total = open_count + completed_count
+        context = {
+            "daily": [
+                {
+                    "day": d.day,
+                    "created": d.created_count,
+                    "completed": d.completed_count,
+                    "created_width": 100 * d.created_count // peak if peak else 0,
+                    "completed_width": 100 * d.completed_count // peak
+                    if peak
+                    else 0,
+                }
+                for d in daily
+            ],
+            "open_count": open_count,
+            "completed_count": completed_count,
+            "overdue_count": overdue_count,
+            "completion_rate": round(100 * completed_count / total) if total else 0,
+            "workload": user_stats.select_related("user").order_by("-open_count")[
+                : self.top_assignees
+            ],
+        }
+        return render(request, self.template_name, context)
+
+
+class ReadinessView(View):
+    """
+    A view for load balancers and orchestrators that answers 200 when every
+    database and the cache respond, and 503 otherwise. It needs no login and
+    runs one trivial query per database """
+
+    def get(self, request):
+        checks = {}
+        for alias in connections:
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                checks[f"database:{alias}"] = "ok"
+            except DatabaseError:
+                checks[f"database:{alias}"] = "unavailable"
+        # a key of its own, so concurrent probes cannot fail each other
+        probe = secrets.token_hex(8)
+        key = f"health:ready:{probe}"
+        try:
+            cache.set(key, probe, 10)
+            cache_ok = cache.get(key) == probe
+            cache.delete(key)
+        except Exception:
+            # cache backends raise their client library's own errors
+            cache_ok = False
+        checks["cache"] = "ok" if cache_ok else "unavailable"
+        ready = all(value == "ok" for value in checks.values())
+        response = JsonResponse(
+            {"ready": ready, "checks": checks}, status=200 if ready else 503
+        )
+        patch_cache_control(response, no_store=True)
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AttachmentUploadView(LoginRequiredMixin, RateLimitMixin, View):
+    """
+    A view that attaches an uploaded file to a task, or to one of its comments
+    when a comment id is posted. The file is streamed to disk while it is
+    received, so the CSRF check runs only after the upload handler is set """
+
+    login_url = "/login/"
+    rate_limit_scope = "attachment"
+
+    def post(self, request, task_id):
+        handler = HashingUploadHandler(request)
+        request.upload_handlers = [handler]
+        return self.upload(request, task_id, handler)
+
+    @method_decorator(csrf_protect)
+    def upload(self, request, task_id, handler):
+        task = Task.objects.filter(id=task_id, workspace=request.workspace).first()
+        if task is None:
+            messages.error(request, "You cannot attach files to an archived task")
+            return redirect("task_detail", task_id=task_id)
+        uploaded = request.FILES.get("file")
+        comment_id = request.POST.get("comment")
+        comment = None
+        if comment_id:
+            try:
+                comment = Comment.objects.filter(id=int(comment_id), task=task).first()
+            except ValueError:
+                # not an id, reported like a comment of another task
+                pass
+        if handler.too_large:
+            limit = filesizeformat(settings.ATTACHMENT_MAX_SIZE)
+            messages.error(request, f"Attachments can be at most {limit}")
+        elif uploaded is None:
+            messages.error(request, "Choose a file to upload")
+        elif comment_id and comment is None:
+            messages.error(request, "That comment does not belong to this task")
+        else:
+            create_attachment(task, uploaded, request.user, comment)
+        return redirect("task_detail", task_id=task.id)
+
+
+class AttachmentDownloadView(LoginRequiredMixin, View):
+    """
+    A view that streams an attachment from disk. It answers Range requests
+    for a single byte range with 206, and If-None-Match with 304 as the
+    content hash is the ETag """
+
+    login_url = "/login/"
+
+    def get(self, request, attachment_id):
+        attachment = Attachment.objects.filter(
+            id=attachment_id, workspace=request.workspace
+        ).first()
+        if attachment is None:
+            raise Http404("Attachment not found")
+        etag = f'"{attachment.sha256}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        byte_range = None
+        # If-Range asks for the range only while the file is unchanged
+        if "Range" in request.headers and request.headers.get("If-Range", etag) == etag:
+            try:
+                byte_range = parse_range(request.headers["Range"], attachment.size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{attachment.size}"
+                return response
+
+        try:
+            file = storage().open(
+                blob_name(attachment.workspace_id, attachment.sha256), "rb"
+            )
+        except FileNotFoundError:
+            raise Http404("Attachment not found")
+        options = {
+            "as_attachment": True,
+            "filename": attachment.name,
+            "content_type": attachment.content_type,
+        }
+        if byte_range is None:
+            response = FileResponse(file, **options)
+        else:
+            first, last = byte_range
+            file.seek(first)
+            response = FileResponse(
+                RangeFile(file, last - first + 1), status=206, **options
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{attachment.size}"
+            response["Content-Length"] = last - first + 1
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        patch_cache_control(response, private=True)
+        return response
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .lazy import LazyView
+
+
+def iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def warm_up_urls():
+    """
+    Imports the URLconf, builds the reverse lookup tables and imports every
+    lazily loaded view. Returns the number of views loaded """
+    resolver = get_resolver()
+    # accessing reverse_dict populates the resolver for reverse()
+    resolver.reverse_dict
+    views = 0
+    for pattern in iter_patterns(resolver.url_patterns):
+        if isinstance(pattern.callback, LazyView):
+            pattern.callback.resolve()
+            views += 1
+    return views
+
+
+def warm_up_templates():
+    """
+    Compiles the project's own templates so they are in the cached loader
+    before the first request. Templates shipped with installed packages, like
+    the admin, are left to load on demand. Returns the number of templates
+    loaded """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    loaded = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            if not directory.is_dir() or not directory.is_relative_to(base_dir):
+                continue
+            for path in sorted(directory.rglob("*.html")):
+                engine.get_template(path.relative_to(directory).as_posix())
+                loaded += 1
+    return loaded
+
+
+def warm_up():
+    """
+    Loads views, URL resolvers and templates up front, meant to run once per
+    process before it accepts traffic """
+    return {"views": warm_up_urls(), "templates": warm_up_templates()}
@@ -0,0 +1,255 @@
+import hashlib
+import hmac
+import http.client
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TaskEvent, WebhookEndpoint
+from .signals import settled
+
+USER_AGENT = "taskapp-webhooks/1"
+
+logger = logging.getLogger(__name__)
+
+
+def event_json(event):
+    """
+    An event as sent to sync clients and webhooks """
+    return {
+        "seq": event.id,
+        "model": event.model,
+        "id": event.object_id,
+        "action": event.action,
+        "data": event.payload,
+    }
+
+
+def sign(secret, timestamp, body):
+    """
+    The hex HMAC-SHA256 of "<timestamp>.<body>" with the endpoint's secret.
+    Receivers recompute it to check a request came from us, the timestamp
+    lets them reject replayed requests """
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def backoff(failures):
+    """
+    Seconds to wait after the given number of failed attempts in a row. The
+    delay doubles per failure up to WEBHOOK_MAX_BACKOFF, half of it random so
+    endpoints failing together do not retry together """
+    base = getattr(settings, "WEBHOOK_BACKOFF", 5)
+    cap = getattr(settings, "WEBHOOK_MAX_BACKOFF", 60 * 60)
+    delay = min(cap, base * 2 ** min(failures - 1, 32))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class ConnectionPool:
+    """
+    Keeps one HTTP/1.1 keep-alive connection per host, so consecutive batches
+    to an endpoint skip the TCP and TLS handshakes """
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self.connections = {}
+
+    def connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        if key not in self.connections:
+            cls = (
+                http.client.HTTPSConnection
+                if scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self.connections[key] = cls(netloc, timeout=self.timeout)
+        return self.connections[key]
+
+    def post(self, url, body, headers):
+        """
+        Posts body to url and returns the status and the response body """
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        for attempt in range(2):
+            connection = self.connection(parts.scheme, parts.netloc)
+            try:
+                connection.request("POST", path, body, headers)
+                response = connection.getresponse()
+                # read to the end, the connection can only be reused then
+                return response.status, response.read()
+            except (ConnectionResetError, BrokenPipeError):
+                # the server closed an idle connection, retry once on a new one
+                connection.close()
+                if attempt:
+                    raise
+            except Exception:
+                connection.close()
+                raise
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+
+def subscribed(endpoint, event):
+    # "revoked" only tells a sync client to drop a task, the "updated" event
+    # next to it already carries the new assignee
+    if event.action == "revoked":
+        return False
+    if not endpoint.event_types:
+        return True
+    return f"{event.model}.{event.action}" in endpoint.event_types
+
+
+def has_pending(endpoint):
+    return TaskEvent.objects.filter(
+        workspace=endpoint.workspace_id, id__gt=endpoint.last_event_id
+    ).exists()
+
+
+def pending_events(endpoint, limit):
+    """
+    The next up to limit settled events of the endpoint's workspace, see
+    taskapp.signals.settled. Returns the ones endpoint subscribed to and the
+    id its cursor moves to once they are delivered, which also skips the
+    events it did not subscribe to """
+    events = settled(
+        TaskEvent.objects.filter(
+            workspace=endpoint.workspace_id, id__gt=endpoint.last_event_id
+        ).order_by("id")[:limit]
+    )
+    if not events:
+        return [], endpoint.last_event_id
+    return [event for event in events if subscribed(endpoint, event)], events[-1].id
+
+
+def post_batch(pool, endpoint, events):
+    body = json.dumps(
+        {"events": [event_json(event) for event in events]}, cls=DjangoJSONEncoder
+    ).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+        # the same batch keeps its id across retries, so receivers can skip
+        # one they already processed
+        "X-Webhook-Id": f"{endpoint.pk}-{events[0].id}-{events[-1].id}",
+        "X-Webhook-Timestamp": timestamp,
+        "X-Webhook-Signature": f"sha256={sign(endpoint.secret, timestamp, body)}",
+    }
+    return pool.post(endpoint.url, body, headers)
+
+
+def lease_end(now):
+    return now + timedelta(seconds=getattr(settings, "WEBHOOK_LEASE_SECONDS", 60))
+
+
+def claim(endpoint, now):
+    """
+    Takes endpoint for this worker by pushing its next attempt past the time
+    a batch may take. False when another worker was first """
+    return bool(
+        WebhookEndpoint.objects.filter(pk=endpoint.pk)
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .update(next_attempt_at=lease_end(now))
+    )
+
+
+def deliver(pool, endpoint, batch_size=100, max_batches=10):
+    """
+    Posts the pending events of endpoint in batches of batch_size until none
+    are left, a batch fails or max_batches were sent. Returns the number of
+    events delivered. An endpoint failing for longer than
+    WEBHOOK_DEACTIVATE_SECONDS is deactivated """
+    delivered = 0
+    error = None
+    for index in range(max_batches):
+        if index:
+            # the claim covers one batch, renew it so no other worker takes
+            # the endpoint over while this one is still sending
+            WebhookEndpoint.objects.filter(pk=endpoint.pk).update(
+                next_attempt_at=lease_end(timezone.now())
+            )
+        events, cursor = pending_events(endpoint, batch_size)
+        if cursor == endpoint.last_event_id:
+            break
+        if events:
+            try:
+                status, _ = post_batch(pool, endpoint, events)
+            except (OSError, http.client.HTTPException) as e:
+                error = f"{type(e).__name__}: {e}"
+            except Exception as e:
+                # anything else must not stop the round, and backs off too
+                logger.exception("Webhook delivery to %s failed", endpoint.url)
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if not 200 <= status < 300:
+                    error = f"HTTP {status}"
+            if error:
+                break
+        endpoint.last_event_id = cursor
+        delivered += len(events)
+        WebhookEndpoint.objects.filter(pk=endpoint.pk).update(
+            last_event_id=endpoint.last_event_id
+        )
+
+    now = timezone.now()
+    if error:
+        endpoint.failures += 1
+        endpoint.failing_since = endpoint.failing_since or now
+        endpoint.next_attempt_at = now + timedelta(seconds=backoff(endpoint.failures))
+        endpoint.last_error = error
+        limit = getattr(settings, "WEBHOOK_DEACTIVATE_SECONDS", 3 * 24 * 60 * 60)
+        if now - endpoint.failing_since > timedelta(seconds=limit):
+            # compact_task_events stops keeping its events from now on
+            endpoint.last_error = (
+                f"Deactivated after failing since "
+                f"{endpoint.failing_since:%Y-%m-%d %H:%M}. {error}"
+            )
+            endpoint.is_active = False
+            endpoint.failing_since = None
+    else:
+        endpoint.failures = 0
+        endpoint.failing_since = None
+        endpoint.next_attempt_at = None
+        endpoint.last_error = ""
+    WebhookEndpoint.objects.filter(pk=endpoint.pk).update(
+        failures=endpoint.failures,
+        failing_since=endpoint.failing_since,
+        next_attempt_at=endpoint.next_attempt_at,
+        last_error=endpoint.last_error,
+        is_active=endpoint.is_active,
+    )
+    return delivered
+
+
+def deliver_due(pool, batch_size=100):
+    """
+    One round of the worker over the active endpoints that are due. Returns
+    the number of events delivered """
+    now = timezone.now()
+    endpoints = WebhookEndpoint.objects.filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+        is_active=True,
+    ).order_by("id")
+    delivered = 0
+    for endpoint in endpoints:
+        # idle endpoints cost one indexed lookup and no writes
+        if has_pending(endpoint) and claim(endpoint, now):
+            # another worker may have delivered between the read and the claim
+            endpoint.refresh_from_db(
+                fields=["last_event_id", "failures", "failing_since"]
+            )
+            delivered += deliver(pool, endpoint, batch_size)
+    return delivered
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskproject.settings')
 
 application = get_asgi_application()
+
+# load views, URL resolvers and templates before the first request comes in
+from taskapp.warmup import warm_up  # noqa: E402
+
+warm_up()
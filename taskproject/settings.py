@@ -14,6 +14,7 @@ import os
 from pathlib import Path
 
 from decouple import config
+from django.utils.functional import lazy
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,14 +46,23 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'taskapp.middleware.WorkspaceMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in response compression and HTML minification. CompressionMiddleware
+# has to stay outermost so it sees the final, minified body.
+if config("COMPRESS_RESPONSES", default=False, cast=bool):
+    MIDDLEWARE.insert(0, 'taskapp.middleware.CompressionMiddleware')
+    MIDDLEWARE.append('taskapp.middleware.HTMLMinifyMiddleware')
+COMPRESSION_MIN_SIZE = 500
+
 ROOT_URLCONF = 'taskproject.urls'
 
 TEMPLATES = [
@@ -91,6 +101,9 @@ DATABASES = {
 }
 
 
+# Tasks and comments of a workspace are stored on the alias set in
+# Workspace.db_alias; add an entry to DATABASES for every alias used.
+DATABASE_ROUTERS = ['taskapp.routers.WorkspaceRouter']
 
 
 # Password validation
@@ -133,6 +146,22 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),  # Project-level static files
 ]
 
+# `collectstatic` writes content-hashed copies of every asset plus gzip and
+# brotli variants; WhiteNoise serves the hashed names with far-future
+# cache headers. Development keeps plain names so no build step is needed.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -140,10 +169,63 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'taskapp.User'
 
+# Limits per view, "<requests>/<s|m|h|d>" per client ip, per logged in user
+# and, for logins, per account tried. Counted in sliding windows in the
+# default cache; use a shared cache backend in production.
+RATE_LIMITS = {
+    "login": {"ip": "10/m", "username": "30/h"},
+    "create_task": {"ip": "60/m", "user": "20/m"},
+    "comment": {"ip": "60/m", "user": "20/m"},
+    "attachment": {"ip": "30/m", "user": "10/m"},
+}
+
+# Uploaded attachments are stored here, once per workspace and content hash.
+# Uploads are spooled to FILE_UPLOAD_TEMP_DIR, keep both on one filesystem so
+# a finished upload is moved into place instead of copied.
+ATTACHMENT_ROOT = config(
+    "ATTACHMENT_ROOT", default=os.path.join(BASE_DIR, "attachments")
+)
+ATTACHMENT_MAX_SIZE = 50 * 1024 * 1024
+
+# Sync clients and webhooks only read task events at least this old. Events
+# get their id on insert but become visible on commit, so a transaction that
+# records events has to commit within this many seconds or its events may be
+# skipped by a cursor that already moved past them.
+TASK_EVENT_SETTLE_SECONDS = 5
+
+# Webhook retries wait WEBHOOK_BACKOFF seconds after the first failure,
+# doubling per failure up to WEBHOOK_MAX_BACKOFF. An endpoint still failing
+# after WEBHOOK_DEACTIVATE_SECONDS is deactivated. A worker holds an endpoint
+# for WEBHOOK_LEASE_SECONDS per batch before another may take it over, keep
+# it above twice the --timeout of deliver_webhooks (a batch may be posted
+# twice when a kept-alive connection was closed).
+WEBHOOK_BACKOFF = 5
+WEBHOOK_MAX_BACKOFF = 60 * 60
+WEBHOOK_DEACTIVATE_SECONDS = 3 * 24 * 60 * 60
+WEBHOOK_LEASE_SECONDS = 60
+
+# Deleted tasks can be restored for this many seconds before
+# `purge_deleted_tasks` is allowed to remove them for good.
+TASK_UNDO_SECONDS = 10 * 60
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
-EMAIL_HOST_USER = config("EMAIL_HOST_USER")
-EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
-DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
+# SMTP credentials are only looked up when an email is sent, processes that
+# never send mail start without them.
+lazy_config = lazy(config, str)
+EMAIL_HOST_USER = lazy_config("EMAIL_HOST_USER")
+EMAIL_HOST_PASSWORD = lazy_config("EMAIL_HOST_PASSWORD")
+DEFAULT_FROM_EMAIL = lazy_config("DEFAULT_FROM_EMAIL")
+
+# Seconds a search result is cached for. Results are also dropped as soon as a
+# task of the workspace changes, this only bounds the memory they hold.
+SEARCH_CACHE_SECONDS = 60
+# Seconds each process reuses its type-ahead index of a workspace before
+# rebuilding it, new assigner names show up after at most this long.
+SEARCH_SUGGESTION_SECONDS = 5 * 60
+
+# Seconds a process may take to import the project and warm up before it
+# serves its first request, enforced by profile_startup.
+STARTUP_BUDGET_SECONDS = 2.0
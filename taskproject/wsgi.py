@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskproject.settings')
 
 application = get_wsgi_application()
+
+# load views, URL resolvers and templates before the first request comes in
+from taskapp.warmup import warm_up  # noqa: E402
+
+warm_up()